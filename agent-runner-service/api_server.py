@@ -4,14 +4,21 @@ FastAPI server for PersonaFlow UI integration
 Provides REST endpoints for persona generation and testing
 """
 import os
-import json
+import re
+import sys
 import uuid
 import asyncio
+import functools
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Deque
+from datetime import datetime, timedelta
+import orjson
+import msgspec
+import redis.asyncio as aioredis
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -21,16 +28,29 @@ dotenv_path = root_dir / ".env"
 load_dotenv(dotenv_path=dotenv_path)
 
 from app.architect import Architect, TestResult
-from app.agent import Agent
+from app.agent import Agent, LLMResponse
 from app.toolbelt import Toolbelt
-from app.clients import LLMServiceClient
+from app.clients import (
+    LLMServiceClient,
+    clean_json_response,
+    awarm_up_connection,
+    create_async_client,
+    gemma_urls_from_env,
+)
 from app.personas import Persona
 
+class ORJSONResponse(JSONResponse):
+    """orjson-rendered JSON, in place of the deprecated fastapi.responses.ORJSONResponse."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 # FastAPI app
 app = FastAPI(
     title="PersonaFlow API",
     description="AI-Powered API Testing with Personas",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for UI integration
@@ -61,68 +81,278 @@ class TestSessionResponse(BaseModel):
     session_id: str
     status: str
 
-class LogMessage(BaseModel):
+# Logs are buffered by the thousand, so they use a compact C-level struct
+# rather than a Pydantic model; API request/response models stay Pydantic.
+class LogMessage(msgspec.Struct):
     timestamp: str
     session_id: str
-    persona_name: Optional[str] = None
-    type: str  # "info", "thinking", "acting", "observing", "error", "complete"
+    type: str  # "info", "thinking", "acting", "observing", "error", "complete", "report_chunk"
     message: str
+    persona_name: Optional[str] = None
     data: Optional[Dict[str, Any]] = None
 
+    def to_bytes(self) -> bytes:
+        return log_encoder.encode(self)
+
+log_encoder = msgspec.json.Encoder()
+
 # In-memory storage for demo (in production, use Redis/DB)
 active_sessions: Dict[str, Dict] = {}
-session_logs: Dict[str, List[LogMessage]] = {}
+session_logs: Dict[str, Deque[LogMessage]] = {}
+
+# Tool output that means the persona reached its goal
+GOAL_COMPLETED_PATTERN = re.compile("Checkout successful|ORDER CONFIRMED")
+
+# Per-session log ring buffer size and how long finished sessions are kept
+SESSION_LOG_LIMIT = 2000
+# Logs broadcast within this window are sent to WebSockets as one frame
+LOG_BATCH_WINDOW_SECONDS = 0.01
+LOG_BATCH_MAX_SIZE = 50
+# How long a new session waits for the UI's WebSocket before starting anyway
+WS_READY_TIMEOUT_SECONDS = 2.0
+SESSION_TTL = timedelta(hours=1)
+SESSION_EVICTION_INTERVAL_SECONDS = 300
+eviction_task: Optional[asyncio.Task] = None
+
+# Optional Redis backend so sessions and logs are shared across workers.
+# When REDIS_URL is unset everything stays in the process-local dicts above.
+REDIS_URL = os.environ.get("REDIS_URL")
+redis_client: Optional[aioredis.Redis] = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+
+def session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+def logs_key(session_id: str) -> str:
+    """Redis list holding the session's logs; also used as its pub/sub channel."""
+    return f"logs:{session_id}"
 
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Per-session outbound queues drained by a flusher task into batched frames
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.flushers: Dict[str, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
-        self.active_connections[session_id] = websocket
+        self.active_connections.setdefault(session_id, set()).add(websocket)
 
-    def disconnect(self, session_id: str):
-        if session_id in self.active_connections:
+    def has(self, session_id: str) -> bool:
+        """Whether any WebSocket is subscribed to the session."""
+        return bool(self.active_connections.get(session_id))
+
+    def disconnect(self, session_id: str, websocket: Optional[WebSocket] = None):
+        connections = self.active_connections.get(session_id)
+        if connections is None:
+            return
+        if websocket is not None:
+            connections.discard(websocket)
+        if websocket is None or not connections:
             del self.active_connections[session_id]
+            self.queues.pop(session_id, None)
+            flusher = self.flushers.pop(session_id, None)
+            if flusher is not None:
+                flusher.cancel()
 
-    async def send_log(self, session_id: str, log: LogMessage):
-        if session_id in self.active_connections:
-            try:
-                print(f"Sending log via WebSocket to {session_id}")
-                await self.active_connections[session_id].send_text(log.model_dump_json())
-            except Exception as e:
-                print(f"WebSocket send error for {session_id}: {e}")
-                self.disconnect(session_id)
-        else:
+    def enqueue_log(self, session_id: str, log: LogMessage):
+        """Queue a log for the session's flusher instead of sending it inline."""
+        queue = self.queues.get(session_id)
+        if queue is None:
+            queue = self.queues[session_id] = asyncio.Queue()
+            self.flushers[session_id] = asyncio.create_task(self._flush_logs(session_id, queue))
+        queue.put_nowait(log)
+
+    async def _flush_logs(self, session_id: str, queue: asyncio.Queue):
+        """Coalesce logs arriving within LOG_BATCH_WINDOW_SECONDS into one frame."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + LOG_BATCH_WINDOW_SECONDS
+            while len(batch) < LOG_BATCH_MAX_SIZE:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.send_logs(session_id, batch)
+
+    async def send_logs(self, session_id: str, logs: List[LogMessage]):
+        connections = self.active_connections.get(session_id)
+        if not connections:
             print(f"No WebSocket connection for session {session_id} (active: {list(self.active_connections.keys())})")
+            return
+
+        # Serialize once, then fan out the same payload to every subscriber.
+        # A single log goes out as an object, a batch as a JSON array.
+        payload = log_encoder.encode(logs[0] if len(logs) == 1 else logs)
+        websockets = list(connections)
+        print(f"Sending {len(logs)} log(s) via WebSocket to {session_id} ({len(websockets)} subscribers)")
+        results = await asyncio.gather(
+            *(ws.send_bytes(payload) for ws in websockets), return_exceptions=True
+        )
+        for ws, result in zip(websockets, results):
+            if isinstance(result, Exception):
+                print(f"WebSocket send error for {session_id}: {result}")
+                self.disconnect(session_id, ws)
 
 manager = ConnectionManager()
 
 # Utility functions
-def create_log(session_id: str, type: str, message: str, persona_name: str = None, data: Dict = None) -> LogMessage:
-    """Create a structured log message."""
-    log = LogMessage(
-        timestamp=datetime.now().isoformat(),
-        session_id=session_id,
-        persona_name=persona_name,
-        type=type,
-        message=message,
-        data=data
-    )
-    
-    # Store log
-    if session_id not in session_logs:
-        session_logs[session_id] = []
-    session_logs[session_id].append(log)
-    
-    return log
+class SessionLogger:
+    """Creates and buffers the log messages of a single session."""
+    __slots__ = ("session_id", "buffer")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        # Oldest entries drop off once the buffer is full
+        self.buffer = session_logs.setdefault(session_id, deque(maxlen=SESSION_LOG_LIMIT))
+
+    def log(self, type: str, message: str, persona_name: str = None, data: Dict = None) -> LogMessage:
+        """Create a structured log message and store it for replay."""
+        log = LogMessage(
+            timestamp=datetime.now().isoformat(timespec="milliseconds"),
+            session_id=self.session_id,
+            persona_name=persona_name,
+            type=type,
+            message=message,
+            data=data
+        )
+        self.buffer.append(log)
+        return log
+
+async def publish_log(session_id: str, log: LogMessage):
+    """Append the log to the capped Redis list and publish it to every worker."""
+    payload = log.to_bytes()
+    key = logs_key(session_id)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.rpush(key, payload)
+        pipe.ltrim(key, -SESSION_LOG_LIMIT, -1)
+        pipe.publish(key, payload)
+        await pipe.execute()
 
 async def broadcast_log(session_id: str, type: str, message: str, persona_name: str = None, data: Dict = None):
     """Create and broadcast a log message."""
-    log = create_log(session_id, type, message, persona_name, data)
+    log = active_sessions[session_id]["logger"].log(type, message, persona_name, data)
     print(f"Broadcasting log to {session_id}: {type} - {message[:50]}...")
-    await manager.send_log(session_id, log)
+    if redis_client is not None:
+        await publish_log(session_id, log)
+    elif manager.has(session_id):
+        # Without a subscriber the log is only stored for replay - no encoding needed
+        manager.enqueue_log(session_id, log)
+
+async def stream_report_chunk(session_id: str, chunk: str):
+    """Send a fragment of the streaming report to live subscribers only.
+
+    Unlike broadcast_log, nothing is stored for replay: the finished report is
+    stored once, with the session and its "complete" log.
+    """
+    log = LogMessage(
+        timestamp=datetime.now().isoformat(timespec="milliseconds"),
+        session_id=session_id,
+        type="report_chunk",
+        message=chunk,
+    )
+    if redis_client is not None:
+        await redis_client.publish(logs_key(session_id), log.to_bytes())
+    elif manager.has(session_id):
+        manager.enqueue_log(session_id, log)
+
+async def save_session(session_id: str, fields: Dict[str, Any]):
+    """Update session metadata locally and, when configured, in Redis."""
+    active_sessions.setdefault(session_id, {}).update(fields)
+    if redis_client is None:
+        return
+
+    key = session_key(session_id)
+    await redis_client.hset(key, mapping={
+        name: orjson.dumps(value, default=lambda obj: obj.model_dump())
+        for name, value in fields.items()
+    })
+    if fields.get("status") in ("completed", "failed"):
+        await redis_client.expire(key, SESSION_TTL)
+        await redis_client.expire(logs_key(session_id), SESSION_TTL)
+
+async def load_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """Look up a session locally, falling back to Redis for other workers' sessions."""
+    if session_id in active_sessions:
+        return active_sessions[session_id]
+    if redis_client is None:
+        return None
+
+    raw = await redis_client.hgetall(session_key(session_id))
+    if not raw:
+        return None
+    return {name.decode(): orjson.loads(value) for name, value in raw.items()}
+
+@app.on_event("startup")
+async def enable_eager_tasks():
+    """Start tasks eagerly so ones that finish without blocking skip the scheduler."""
+    if sys.version_info >= (3, 12):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+
+def evict_expired_sessions():
+    """Drop finished sessions (and their logs) older than SESSION_TTL."""
+    cutoff = datetime.now() - SESSION_TTL
+    expired = [
+        session_id
+        for session_id, session in active_sessions.items()
+        if session["status"] in ("completed", "failed")
+        and datetime.fromisoformat(session.get("completed_at", session["created_at"])) < cutoff
+    ]
+    for session_id in expired:
+        active_sessions.pop(session_id, None)
+        session_logs.pop(session_id, None)
+    if expired:
+        print(f"Evicted {len(expired)} expired sessions")
+
+async def session_eviction_loop():
+    while True:
+        await asyncio.sleep(SESSION_EVICTION_INTERVAL_SECONDS)
+        evict_expired_sessions()
+
+@app.on_event("startup")
+async def start_session_eviction():
+    global eviction_task
+    eviction_task = asyncio.create_task(session_eviction_loop())
+
+@app.on_event("shutdown")
+async def stop_session_eviction():
+    if eviction_task is not None:
+        eviction_task.cancel()
+
+@app.on_event("startup")
+async def open_http_client():
+    """One pooled HTTP/2 client shared by every session's LLM calls."""
+    app.state.http = create_async_client()
+    # Connect to the LLM service now so the first session doesn't pay for the handshake
+    gemma_urls = gemma_urls_from_env()
+    if gemma_urls:
+        app.state.warm_up_task = asyncio.gather(
+            *(awarm_up_connection(app.state.http, url.rstrip("/")) for url in gemma_urls)
+        )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await app.state.http.aclose()
+
+@app.on_event("shutdown")
+async def close_redis():
+    if redis_client is not None:
+        await redis_client.aclose()
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    """Close the HTTP clients of any sessions still running at shutdown."""
+    for session in active_sessions.values():
+        llm_client = session.pop("llm_client", None)
+        if llm_client is not None:
+            await llm_client.aclose()
 
 # API Endpoints
 
@@ -175,16 +405,21 @@ async def start_test_session(request: TestRequest):
         session_id = str(uuid.uuid4())
         
         # Store session info
-        active_sessions[session_id] = {
+        await save_session(session_id, {
             "status": "started",
             "personas": request.personas,
             "test_goal": request.test_goal,
             "api_url": request.api_url,
             "max_steps": request.max_steps,
             "created_at": datetime.now().isoformat()
-        }
+        })
+        # Bound once per session; kept out of save_session as it's process-local
+        active_sessions[session_id]["logger"] = SessionLogger(session_id)
+        # Set by the WebSocket handler once the UI has subscribed to the logs
+        active_sessions[session_id]["ws_ready"] = asyncio.Event()
         
-        # Start background testing task with user-friendly delay
+        # Start background testing task once the UI is listening
+        # (runs eagerly up to its first real await on Python 3.12+)
         asyncio.create_task(delayed_test_session(session_id, request))
         
         print(f"Started test session {session_id} with {len(request.personas)} personas")
@@ -196,18 +431,21 @@ async def start_test_session(request: TestRequest):
 
 @app.get("/api/test-sessions/{session_id}")
 async def get_session_status(session_id: str):
-    if session_id not in active_sessions:
+    session = await load_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = active_sessions[session_id]
-    logs = session_logs.get(session_id, [])
+    if redis_client is not None:
+        log_count = await redis_client.llen(logs_key(session_id))
+    else:
+        log_count = len(session_logs.get(session_id, []))
     
     return {
         "session_id": session_id,
         "status": session["status"],
         "personas": session["personas"],
         "test_goal": session["test_goal"],
-        "log_count": len(logs),
+        "log_count": log_count,
         "created_at": session["created_at"]
     }
 
@@ -216,20 +454,26 @@ async def websocket_logs(websocket: WebSocket, session_id: str):
     print(f"🔌 WebSocket connection attempt for session: {session_id}")
     
     # Check if session exists
-    if session_id not in active_sessions:
+    if await load_session(session_id) is None:
         print(f"Session {session_id} not found in active_sessions")
         await websocket.close(code=4004, reason="Session not found")
         return
     
+    if redis_client is not None:
+        await websocket.accept()
+        mark_ws_ready(session_id)
+        await stream_logs_from_redis(websocket, session_id)
+        return
+    
     await manager.connect(websocket, session_id)
+    mark_ws_ready(session_id)
     print(f"WebSocket connected for session: {session_id}")
     
     try:
         # Send existing logs if any
         if session_id in session_logs:
             print(f"Sending {len(session_logs[session_id])} existing logs to WebSocket")
-            for log in session_logs[session_id]:
-                await websocket.send_text(log.model_dump_json())
+            await websocket.send_bytes(log_encoder.encode(list(session_logs[session_id])))
         else:
             print(f"No existing logs for session {session_id}")
         
@@ -238,28 +482,66 @@ async def websocket_logs(websocket: WebSocket, session_id: str):
             await websocket.receive_text()  # Wait for client messages
             
     except WebSocketDisconnect:
-        manager.disconnect(session_id)
+        manager.disconnect(session_id, websocket)
         print(f"WebSocket disconnected for session {session_id}")
 
+async def stream_logs_from_redis(websocket: WebSocket, session_id: str):
+    """Replay stored logs and forward new ones published by any worker."""
+    key = logs_key(session_id)
+    pubsub = redis_client.pubsub()
+    # Subscribe before replaying so nothing published in between is missed
+    await pubsub.subscribe(key)
+    
+    async def forward_published_logs():
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                await websocket.send_bytes(message["data"])
+    
+    forwarder = None
+    try:
+        for payload in await redis_client.lrange(key, 0, -1):
+            await websocket.send_bytes(payload)
+        forwarder = asyncio.create_task(forward_published_logs())
+        
+        # Keep connection alive
+        while True:
+            await websocket.receive_text()
+            
+    except WebSocketDisconnect:
+        print(f"WebSocket disconnected for session {session_id}")
+    finally:
+        if forwarder is not None:
+            forwarder.cancel()
+        await pubsub.unsubscribe(key)
+        await pubsub.aclose()
+
 # Delayed start to allow WebSocket connection
 async def delayed_test_session(session_id: str, request: TestRequest):
     try:
         # Give immediate feedback that we're preparing
         await broadcast_log(session_id, "info", "Preparing test environment...")
-        await asyncio.sleep(0.5)  # Brief pause for WebSocket to connect
         
-        await broadcast_log(session_id, "info", "Initializing AI agents...")
-        await asyncio.sleep(0.5)  # Another brief pause
+        # Wait for the WebSocket to connect, but don't hold the session up if it never does
+        try:
+            await asyncio.wait_for(active_sessions[session_id]["ws_ready"].wait(), timeout=WS_READY_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"No WebSocket connected for session {session_id} after {WS_READY_TIMEOUT_SECONDS}s, starting anyway")
         
+        await broadcast_log(session_id, "info", "Initializing AI agents...")
         await broadcast_log(session_id, "info", "Ready to start persona testing!")
-        await asyncio.sleep(0.5)  # Final pause
         
         # Now start the actual testing
         await run_test_session(session_id, request)
         
     except Exception as e:
         await broadcast_log(session_id, "error", f"Failed to start testing: {str(e)}")
-        active_sessions[session_id]["status"] = "failed"
+        await save_session(session_id, {"status": "failed"})
+
+def mark_ws_ready(session_id: str):
+    """Release a session waiting in delayed_test_session for its WebSocket."""
+    ws_ready = active_sessions.get(session_id, {}).get("ws_ready")
+    if ws_ready is not None:
+        ws_ready.set()
 
 # Background task for running persona tests
 async def run_test_session(session_id: str, request: TestRequest):
@@ -267,7 +549,7 @@ async def run_test_session(session_id: str, request: TestRequest):
         await broadcast_log(session_id, "info", f"Starting test session with {len(request.personas)} personas")
         
         # Update session status
-        active_sessions[session_id]["status"] = "testing"
+        await save_session(session_id, {"status": "testing"})
         
         # Check environment
         mock_api_url = request.api_url
@@ -280,55 +562,76 @@ async def run_test_session(session_id: str, request: TestRequest):
         
         if not gemma_url:
             await broadcast_log(session_id, "error", "GEMMA_URL not configured")
-            active_sessions[session_id]["status"] = "failed"
+            await save_session(session_id, {"status": "failed"})
             return
         
         # Initialize components
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
-        llm_client = LLMServiceClient()
-        test_results = []
+        llm_client = await LLMServiceClient.acreate(http_client=app.state.http)
+        active_sessions[session_id]["llm_client"] = llm_client
         
-        # Run each persona
-        for i, persona_data in enumerate(request.personas):
-            persona_name = persona_data.name
-            await broadcast_log(session_id, "info", f"Starting tests for {persona_name} ({i+1}/{len(request.personas)})")
-            
-            # Convert to Persona object
-            persona = Persona(name=persona_data.name, system_prompt=persona_data.system_prompt)
-            
-            # Run persona test
-            result = await run_persona_test_async(
-                session_id, persona, request.test_goal, toolbelt, llm_client, request.max_steps
+        # Run all personas concurrently - each agent has its own memory, and its own
+        # toolbelt so the mock API keeps a separate cart per persona
+        tasks = [
+            run_persona_with_status(
+                session_id, i, persona_data, request,
+                Toolbelt(api_base_url=mock_api_url, http_client=app.state.http, session_id=f"{session_id}-{i}"),
+                llm_client,
             )
-            
-            if result:
-                test_results.append(result)
-                status = "Success" if result.was_successful else "Failed"
-                await broadcast_log(session_id, "info", f"{persona_name} completed: {status}")
-            else:
-                await broadcast_log(session_id, "error", f"{persona_name} failed to complete")
+            for i, persona_data in enumerate(request.personas)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        test_results = [r for r in results if isinstance(r, TestResult)]
         
         # Generate final report using Architect
         await broadcast_log(session_id, "info", "Generating final report...")
-        architect = Architect()
-        final_report = architect.synthesize_report(request.test_goal, test_results)
+        architect = Architect(http_client=app.state.http)
+        final_report = await architect.asynthesize_report(
+            request.test_goal, test_results,
+            on_chunk=functools.partial(stream_report_chunk, session_id)
+        )
         
-        # Store final results
-        active_sessions[session_id].update({
+        # Store final results; dumped once for both the session and the broadcast
+        result_dicts = [r.model_dump() for r in test_results]
+        await save_session(session_id, {
             "status": "completed",
-            "test_results": [r.model_dump() for r in test_results],
+            "test_results": result_dicts,
             "final_report": final_report,
             "completed_at": datetime.now().isoformat()
         })
         
         await broadcast_log(session_id, "complete", "All persona tests completed!", data={
             "report": final_report,
-            "results": [r.model_dump() for r in test_results]
+            "results": result_dicts
         })
         
     except Exception as e:
         await broadcast_log(session_id, "error", f"Test session failed: {str(e)}")
-        active_sessions[session_id]["status"] = "failed"
+        await save_session(session_id, {"status": "failed"})
+    finally:
+        llm_client = active_sessions[session_id].pop("llm_client", None)
+        if llm_client is not None:
+            await llm_client.aclose()
+
+async def run_persona_with_status(session_id: str, index: int, persona_data: PersonaResponse, request: TestRequest, toolbelt: Toolbelt, llm_client: LLMServiceClient) -> Optional[TestResult]:
+    """Run a single persona test, broadcasting its own start/completion logs."""
+    persona_name = persona_data.name
+    await broadcast_log(session_id, "info", f"Starting tests for {persona_name} ({index+1}/{len(request.personas)})")
+    
+    # Convert to Persona object
+    persona = Persona(name=persona_data.name, system_prompt=persona_data.system_prompt)
+    
+    # Run persona test
+    result = await run_persona_test_async(
+        session_id, persona, request.test_goal, toolbelt, llm_client, request.max_steps
+    )
+    
+    if result:
+        status = "Success" if result.was_successful else "Failed"
+        await broadcast_log(session_id, "info", f"{persona_name} completed: {status}")
+    else:
+        await broadcast_log(session_id, "error", f"{persona_name} failed to complete")
+    
+    return result
 
 async def run_persona_test_async(session_id: str, persona: Persona, goal: str, toolbelt: Toolbelt, llm_client: LLMServiceClient, max_steps: int = 8) -> Optional[TestResult]:
     try:
@@ -337,6 +640,7 @@ async def run_persona_test_async(session_id: str, persona: Persona, goal: str, t
         
         # Create agent
         agent = Agent(persona=persona, toolbelt=toolbelt, llm_client=llm_client)
+        was_successful = False
         
         # Run agent steps
         for step in range(max_steps):
@@ -346,29 +650,25 @@ async def run_persona_test_async(session_id: str, persona: Persona, goal: str, t
                 
                 # Get LLM response
                 await broadcast_log(session_id, "thinking", f"{persona_name} is thinking (step {step + 1})...", persona_name)
+                
                 await broadcast_log(session_id, "info", f"🔄 Calling Gemma service for {persona_name}...")
                 
                 try:
-                    llm_output_str = llm_client.invoke(prompt)
+                    llm_output_str = await llm_client.ainvoke(prompt)
                     await broadcast_log(session_id, "info", f"Gemma service responded for {persona_name} (length: {len(llm_output_str)})")
                 except Exception as llm_error:
                     await broadcast_log(session_id, "error", f"Gemma service error for {persona_name}: {str(llm_error)}", persona_name)
                     raise llm_error
                 
                 # Parse response
-                from app.clients import clean_json_response
-                from app.agent import LLMResponse
-                
                 cleaned_json = clean_json_response(llm_output_str)
                 llm_response = LLMResponse.model_validate_json(cleaned_json)
                 
                 # Log thought
                 await broadcast_log(session_id, "thinking", f"{persona_name}: \"{llm_response.thought}\"", persona_name)
                 
-                # Add to memory
-                agent.memory.append(
-                    {"role": "assistant", "content": llm_response.model_dump_json()}
-                )
+                # Add to memory; cleaned_json was just validated, so no need to re-serialize
+                agent._remember("assistant", cleaned_json)
                 
                 # Execute tool
                 await broadcast_log(session_id, "acting", f"{persona_name} is using: {llm_response.tool_name}", persona_name, {
@@ -379,7 +679,7 @@ async def run_persona_test_async(session_id: str, persona: Persona, goal: str, t
                 await broadcast_log(session_id, "info", f"🔧 Calling API tool: {llm_response.tool_name} with {llm_response.parameters}")
                 
                 try:
-                    tool_result = toolbelt.use_tool(llm_response.tool_name, llm_response.parameters)
+                    tool_result = await toolbelt.ause_tool(llm_response.tool_name, llm_response.parameters)
                     await broadcast_log(session_id, "info", f"API tool responded (length: {len(str(tool_result))})")
                 except Exception as tool_error:
                     await broadcast_log(session_id, "error", f"API tool error: {str(tool_error)}")
@@ -391,12 +691,11 @@ async def run_persona_test_async(session_id: str, persona: Persona, goal: str, t
                 })
                 
                 # Add observation to memory
-                agent.memory.append(
-                    {"role": "tool_observation", "content": tool_result}
-                )
+                agent._remember("tool_observation", tool_result)
                 
                 # Check for completion
-                if "Checkout successful" in tool_result or "ORDER CONFIRMED" in tool_result:
+                if GOAL_COMPLETED_PATTERN.search(tool_result):
+                    was_successful = True
                     await broadcast_log(session_id, "info", f"{persona_name} completed the goal successfully!", persona_name)
                     break
                     
@@ -404,13 +703,6 @@ async def run_persona_test_async(session_id: str, persona: Persona, goal: str, t
                 await broadcast_log(session_id, "error", f"{persona_name} encountered error at step {step + 1}: {str(e)}", persona_name)
                 break
         
-        # Determine success
-        was_successful = any(
-            "Checkout successful" in entry.get("content", "") or 
-            "ORDER CONFIRMED" in entry.get("content", "")
-            for entry in agent.memory
-        )
-        
         return TestResult(
             persona_name=persona.name,
             log=agent.memory,
@@ -428,10 +720,13 @@ if __name__ == "__main__":
     print("API docs at: http://localhost:8000/docs")
     print("WebSocket logs at: ws://localhost:8000/api/test-sessions/{session_id}/logs")
     
+    # uvloop and httptools come with uvicorn[standard]; reload only for local development
     uvicorn.run(
         "api_server:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        reload=os.environ.get("DEV") == "1",
         log_level="info"
     )
\ No newline at end of file
@@ -1,17 +1,30 @@
-import json
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+import msgspec
+from typing import List, Dict, Any, Optional, Tuple
 from .toolbelt import Toolbelt
-from .clients import LLMClient
+from .clients import LLMClient, clean_json_response
 from .personas import Persona
 
 
-class LLMResponse(BaseModel):
-    thought: str = Field(description="Your reasoning and critique about the last step.")
-    tool_name: str = Field(description="The name of the single tool to use next.")
-    parameters: Dict[str, Any] = Field(
-        description="The parameters for the chosen tool."
-    )
+# Decoded on every agent step, so a msgspec struct rather than a Pydantic model
+class LLMResponse(msgspec.Struct):
+    thought: str  # Your reasoning and critique about the last step.
+    tool_name: str  # The name of the single tool to use next.
+    parameters: Dict[str, Any]  # The parameters for the chosen tool.
+
+    @classmethod
+    def model_validate(cls, obj: Any) -> "LLMResponse":
+        return msgspec.convert(obj, cls)
+
+    @classmethod
+    def model_validate_json(cls, data) -> "LLMResponse":
+        return _llm_response_decoder.decode(data)
+
+
+_llm_response_decoder = msgspec.json.Decoder(LLMResponse)
+
+
+# Leading whitespace of each prompt line
+_INDENT = " " * 20
 
 
 class Agent:
@@ -20,38 +33,58 @@ class Agent:
         self.toolbelt = toolbelt
         self.llm_client = llm_client
         self.memory: List[Dict[str, str]] = []
-
-    def _create_prompt(self, goal: str) -> str:
-        system_prompt = self.persona.system_prompt
-
-        tool_descriptions = self.toolbelt.get_tool_descriptions()
-
-        history = "\n".join(
-            [f"{msg['role']}:\n{msg['content']}" for msg in self.memory]
+        # Pre-rendered "role:\ncontent" entries (newline-separated), kept in step with memory
+        self._history_parts: List[str] = []
+        # Everything before the history, for the goal it was last built for
+        self._prompt_header: Optional[Tuple[str, str]] = None
+
+        # The persona, tools and response format don't change during a run,
+        # so they're built once and only the goal and history vary per step.
+        # Each line keeps the indentation of the original inline prompt, so the
+        # text sent to the LLM is unchanged.
+        self._prompt_prefix = (
+            f"\n{_INDENT}{persona.system_prompt}\n\n"
+            f'{_INDENT}Your ultimate goal is: "'
+        )
+        self._prompt_tools = (
+            '"\n\n'
+            f"{_INDENT}You have the following tools available:\n"
+            f"{_INDENT}{toolbelt.get_tool_descriptions()}\n\n"
+            f"{_INDENT}This is the history of your actions and observations so far:\n"
+            f"{_INDENT}<history>\n"
+            f"{_INDENT}"
+        )
+        self._prompt_suffix = (
+            f"\n{_INDENT}</history>\n\n"
+            f"{_INDENT}Based on your persona, the goal, and the history, what is your next step?\n"
+            f"{_INDENT}You MUST respond in the following JSON format:\n"
+            f"{_INDENT}{{\n"
+            f'{_INDENT}"thought": "Your detailed thought process and critique of the last observation.",\n'
+            f'{_INDENT}"tool_name": "The single tool you will use next.",\n'
+            f'{_INDENT}"parameters": {{ "param_name": "param_value" }}\n'
+            f"{_INDENT}}}\n"
+            "                "
         )
 
-        prompt = f"""
-                    {system_prompt}
-
-                    Your ultimate goal is: "{goal}"
-
-                    You have the following tools available:
-                    {tool_descriptions}
+    def _remember(self, role: str, content: str):
+        """Record a memory entry and its rendered history line."""
+        self.memory.append({"role": role, "content": content})
+        separator = "\n" if self._history_parts else ""
+        self._history_parts.append(f"{separator}{role}:\n{content}")
 
-                    This is the history of your actions and observations so far:
-                    <history>
-                    {history if history else "No actions taken yet."}
-                    </history>
+    def _create_prompt(self, goal: str) -> str:
+        # The goal is fixed for a run, so the header is only rebuilt when it changes
+        if self._prompt_header is None or self._prompt_header[0] != goal:
+            self._prompt_header = (
+                goal,
+                f"{self._prompt_prefix}{goal}{self._prompt_tools}",
+            )
+        header = self._prompt_header[1]
 
-                    Based on your persona, the goal, and the history, what is your next step?
-                    You MUST respond in the following JSON format:
-                    {{
-                    "thought": "Your detailed thought process and critique of the last observation.",
-                    "tool_name": "The single tool you will use next.",
-                    "parameters": {{ "param_name": "param_value" }}
-                    }}
-                """
-        return prompt
+        if not self._history_parts:
+            return f"{header}No actions taken yet.{self._prompt_suffix}"
+        # One join copies each history entry once
+        return "".join([header, *self._history_parts, self._prompt_suffix])
 
     def run(self, goal: str, max_steps: int = 10):
         print(f"--- Starting run for {self.persona.name} with goal: {goal} ---")
@@ -67,7 +100,6 @@ class Agent:
 
             try:
                 # Clean the JSON response to handle markdown code blocks
-                from .clients import clean_json_response
                 cleaned_json = clean_json_response(llm_output_str)
                 llm_response = LLMResponse.model_validate_json(cleaned_json)
             except Exception as e:
@@ -77,9 +109,8 @@ class Agent:
 
             # Log the thought process
             print(f"Thought: {llm_response.thought}")
-            self.memory.append(
-                {"role": "assistant", "content": llm_response.model_dump_json()}
-            )
+            # cleaned_json was just validated, so keep it as-is rather than re-serializing
+            self._remember("assistant", cleaned_json)
 
             # 3. ACT: Use the chosen tool
             print(f"Action: {llm_response.tool_name}({llm_response.parameters})")
@@ -89,7 +120,7 @@ class Agent:
 
             # 4. OBSERVE: Log the result
             print(f"Observation:\n{tool_result}")
-            self.memory.append({"role": "tool_observation", "content": tool_result})
+            self._remember("tool_observation", tool_result)
 
             # A simple check for goal completion
             if "Checkout successful" in tool_result:
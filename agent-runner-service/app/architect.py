@@ -1,10 +1,13 @@
 # agent-runner-service/app/architect.py
 
-import json
 import os
+import asyncio
+import orjson
+import simdjson
 from pathlib import Path
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+import httpx
+from pydantic import BaseModel, ConfigDict
 from dotenv import load_dotenv
 from .clients import (
     VertexAIClient,
@@ -19,23 +22,46 @@ load_dotenv(dotenv_path=dotenv_path)
 
 # We'll need a data structure for the results
 class TestResult(BaseModel):
+    # Results are only read once a run finishes
+    model_config = ConfigDict(frozen=True)
+
     persona_name: str
-    log: List[Dict[str, Any]]  # The full memory of the agent run
+    # The full memory of the agent run (a list of entry dicts). Typed as a bare list so
+    # Pydantic doesn't walk every entry: the log is only forwarded, never validated.
+    log: List[Any]
     was_successful: bool
 
 
-class Architect:
-    def __init__(self):
-        # Use HACKATHON_PROJECT_ID from environment
-        project_id = os.getenv("HACKATHON_PROJECT_ID")
-        # Use global location for Vertex AI as per curl example
-        self.client = VertexAIClient(project_id=project_id, location="global")
+# Report prompts keep only the tail of each run and clip long values (e.g. full product
+# listings in tool observations); the prompt size drives Vertex cost and latency
+REPORT_LOG_MAX_ENTRIES = 20
+REPORT_LOG_MAX_VALUE_CHARS = 500
 
-    def generate_personas(
-        self, market_segment: str, num_personas: int = 5
-    ) -> List[Persona]:
 
-        system_instruction = """You are an expert market researcher and product strategist.
+def _compact_log(log: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Last REPORT_LOG_MAX_ENTRIES entries of a run log, with long strings clipped."""
+    return [
+        {
+            key: value[:REPORT_LOG_MAX_VALUE_CHARS] + "..."
+            if isinstance(value, str) and len(value) > REPORT_LOG_MAX_VALUE_CHARS
+            else value
+            for key, value in entry.items()
+        }
+        for entry in log[-REPORT_LOG_MAX_ENTRIES:]
+    ]
+
+
+def _format_log_table(log: List[Dict[str, Any]]) -> str:
+    """Serialize a run log column-wise, so each key is written once rather than once per entry."""
+    columns = list(dict.fromkeys(key for entry in log for key in entry))
+    rows = [f"columns: [{', '.join(columns)}]", "rows:"]
+    for entry in log:
+        rows.append(b"|".join(orjson.dumps(entry.get(column)) for column in columns).decode())
+    return "\n".join(rows)
+
+
+class Architect:
+    _PERSONA_SYSTEM_INSTRUCTION = """You are an expert market researcher and product strategist.
 Your task is to generate a certain number of distinct user personas based on the following market segment description provided by the user. They might also provide information on what specific aspect of the application they are looking to test. 
 
 For each persona, you must create a name and a detailed system_prompt that a future AI agent will use.
@@ -43,29 +69,36 @@ The system_prompt should encapsulate their personality, technical skill, goals,
 
 You MUST respond with ONLY a valid JSON array, where each object in the array that is provided to you."""
 
-        user_prompt = f"""Generate exactly {num_personas} distinct user personas for the market segment: "{market_segment}"""
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        # Use HACKATHON_PROJECT_ID from environment
+        project_id = os.getenv("HACKATHON_PROJECT_ID")
+        # Use global location for Vertex AI as per curl example
+        self.client = VertexAIClient(
+            project_id=project_id, location="global", http_client=http_client
+        )
+        self._parser = simdjson.Parser()
 
-        try:
-            # Use structured output with the exact schema that worked in playground
-            response_str = self.client.invoke(
-                prompt=user_prompt,
-                response_schema=PERSONA_RESPONSE_SCHEMA,
-                system_instruction=system_instruction,
-            )
+    def _build_persona_prompt(self, market_segment: str, num_personas: int) -> str:
+        return f"""Generate exactly {num_personas} distinct user personas for the market segment: "{market_segment}"""
 
-            # Parse the JSON string into Python objects
-            personas_data = json.loads(response_str)
+    def _parse_personas(self, response_str: str) -> List[Persona]:
+        try:
+            # Lazily parse the JSON array, only reading the fields a Persona keeps
+            personas_data = self._parser.parse(response_str.encode())
             print(
-                f"DEBUG: Number of personas: {len(personas_data) if isinstance(personas_data, list) else 'Not a list'}"
+                f"DEBUG: Number of personas: {len(personas_data) if isinstance(personas_data, simdjson.Array) else 'Not a list'}"
             )
 
             # With structured output, should always be an array
-            if not isinstance(personas_data, list):
+            if not isinstance(personas_data, simdjson.Array):
                 print("ERROR: Structured output should return array, got single object")
                 return []
 
-            return [Persona(**p_data) for p_data in personas_data]
-        except json.JSONDecodeError as e:
+            return [
+                Persona(name=p_data["name"], system_prompt=p_data["system_prompt"])
+                for p_data in personas_data
+            ]
+        except ValueError as e:
             print(f"ARCHITECT ERROR: Invalid JSON from LLM: {e}")
             print(f"Raw response was: {response_str}")
             return []
@@ -73,21 +106,58 @@ You MUST respond with ONLY a valid JSON array, where each object in the array th
             print(f"ARCHITECT ERROR: Failed to generate personas. {e}")
             return []
 
-    def synthesize_report(self, goal: str, test_results: List[TestResult]) -> str:
-        print("ARCHITECT: Synthesizing final report from all test results...")
+    def generate_personas(
+        self, market_segment: str, num_personas: int = 5
+    ) -> List[Persona]:
+        # Use structured output with the exact schema that worked in playground
+        response_str = self.client.invoke(
+            prompt=self._build_persona_prompt(market_segment, num_personas),
+            response_schema=PERSONA_RESPONSE_SCHEMA,
+            system_instruction=self._PERSONA_SYSTEM_INSTRUCTION,
+        )
+        return self._parse_personas(response_str)
+
+    async def agenerate_personas(
+        self, market_segment: str, num_personas: int = 5
+    ) -> List[Persona]:
+        """Async variant of generate_personas, so several segments can be generated at once."""
+        response_str = await self.client.ainvoke(
+            prompt=self._build_persona_prompt(market_segment, num_personas),
+            response_schema=PERSONA_RESPONSE_SCHEMA,
+            system_instruction=self._PERSONA_SYSTEM_INSTRUCTION,
+        )
+        return self._parse_personas(response_str)
+
+    async def agenerate_personas_batch(
+        self, market_segments: List[str], num_personas: int = 5
+    ) -> List[List[Persona]]:
+        """Generate personas for several market segments concurrently, one request per segment."""
+        return list(
+            await asyncio.gather(
+                *(
+                    self.agenerate_personas(segment, num_personas)
+                    for segment in market_segments
+                )
+            )
+        )
 
-        raw_logs_text = ""
+    def _build_report_prompt(self, goal: str, test_results: List[TestResult]) -> str:
+        raw_logs = []
         for result in test_results:
-            raw_logs_text += f"\n--- START LOG: {result.persona_name} (Success: {result.was_successful}) ---\n"
-            raw_logs_text += json.dumps(result.log, indent=2)
-            raw_logs_text += f"\n--- END LOG: {result.persona_name} ---\n"
+            omitted = len(result.log) - REPORT_LOG_MAX_ENTRIES
+            note = f", first {omitted} of {len(result.log)} entries omitted" if omitted > 0 else ""
+            raw_logs.append(f"\n--- START LOG: {result.persona_name} (Success: {result.was_successful}{note}) ---\n")
+            raw_logs.append(_format_log_table(_compact_log(result.log)))
+            raw_logs.append(f"\n--- END LOG: {result.persona_name} ---\n")
+        raw_logs_text = "".join(raw_logs)
 
         prompt = f"""
         You are a principal product manager analyzing the results of an automated API test.
         The overall goal of the test was: "{goal}"
 
         Multiple AI agents, each with a different persona, attempted this goal.
-        Below are the raw JSON logs of their thought processes and actions.
+        Below are the raw logs of their thought processes and actions. Each log is a table:
+        a header naming the columns, then one row of JSON values per step, separated by "|".
 
         <RAW_LOGS>
         {raw_logs_text}
@@ -110,5 +180,33 @@ You MUST respond with ONLY a valid JSON array, where each object in the array th
         Briefly summarize the experience of 2-3 key personas, highlighting how their unique personality led to different outcomes.
         """
 
+        return prompt
+
+    def synthesize_report(self, goal: str, test_results: List[TestResult]) -> str:
+        print("ARCHITECT: Synthesizing final report from all test results...")
+
+        prompt = self._build_report_prompt(goal, test_results)
         report = self.client.invoke(prompt)
         return report
+
+    async def asynthesize_report(
+        self,
+        goal: str,
+        test_results: List[TestResult],
+        on_chunk: Optional[Callable[[str], Awaitable[Any]]] = None,
+    ) -> str:
+        """Streaming variant of synthesize_report; each chunk is passed to on_chunk as it arrives."""
+        print("ARCHITECT: Streaming final report from all test results...")
+
+        prompt = self._build_report_prompt(goal, test_results)
+        chunks = []
+        try:
+            async for chunk in self.client.astream(prompt):
+                chunks.append(chunk)
+                if on_chunk is not None:
+                    await on_chunk(chunk)
+        except Exception as e:
+            # Same fallback as the non-streaming invoke, so the session keeps its test results
+            print(f"ARCHITECT: Could not stream report from Vertex AI: {e}")
+            return '{"error": "Failed to communicate with Vertex AI."}'
+        return "".join(chunks)
@@ -1,15 +1,46 @@
 # agent-runner-service/app/clients.py
 import requests
+import httpx
+import asyncio
+import contextlib
 import os
 import re
-import json
-from typing import Dict, Any, Optional, Protocol
+import orjson
+import msgspec
+import time
+import hashlib
+import struct
+import functools
+import logging
+import itertools
+import subprocess
+import threading
+import simdjson
+from dataclasses import dataclass
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional, Protocol, AsyncIterator, Iterator, Tuple, Mapping
 from pydantic import BaseModel
 from typing import List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+logger = logging.getLogger(__name__)
 
-# Types for request/response handling
-class LLMRequest(BaseModel):
+# Imported once per process; only needed when talking to real GCP endpoints
+try:
+    import google.auth
+    import google.auth.transport.requests as google_auth_requests
+    import google.oauth2.id_token as google_id_token
+except ImportError:
+    google_auth_requests = google_id_token = None
+
+
+# Types for request/response handling.
+# Internal per-call values, so plain slotted dataclasses rather than validated models.
+@dataclass(slots=True)
+class LLMRequest:
     """Standard request format for LLM APIs."""
 
     prompt: str
@@ -19,11 +50,14 @@ class LLMRequest(BaseModel):
     top_p: Optional[float] = 1.0
 
 
-class LLMResponse(BaseModel):
+@dataclass(slots=True)
+class LLMResponse:
     """Standard response format from LLM APIs."""
 
     text: str
     raw_data: Dict[str, Any]
+    # The text decoded as JSON, when it is JSON (e.g. structured output)
+    parsed: Optional[Any] = None
 
 
 class PersonaSchema(BaseModel):
@@ -62,6 +96,204 @@ PERSONA_RESPONSE_SCHEMA = {
 }
 
 
+@functools.lru_cache(maxsize=1)
+def _auth_request():
+    """google-auth transport, built once so token fetches reuse its HTTP session."""
+    return google_auth_requests.Request()
+
+
+@functools.lru_cache(maxsize=1)
+def _default_credentials():
+    """Application Default Credentials, resolved once per process and refreshed in place."""
+    credentials, _ = google.auth.default(
+        scopes=["https://www.googleapis.com/auth/cloud-platform"]
+    )
+    return credentials
+
+
+# Cloud Run identity tokens live for an hour; reuse them for 55 minutes
+ID_TOKEN_TTL_SECONDS = 55 * 60
+_id_token_cache: Dict[str, Tuple[str, float]] = {}
+
+
+def fetch_cached_id_token(audience: str) -> str:
+    """Fetch an identity token for audience, reusing a cached one while it is fresh."""
+    now = time.time()
+    cached = _id_token_cache.get(audience)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    if google_id_token is None:
+        raise RuntimeError("google-auth is not installed")
+
+    id_token = google_id_token.fetch_id_token(_auth_request(), audience)
+    _id_token_cache[audience] = (id_token, now + ID_TOKEN_TTL_SECONDS)
+    return id_token
+
+
+# Refresh OAuth access tokens this long before they actually expire
+ACCESS_TOKEN_REFRESH_MARGIN_SECONDS = 60
+_access_token_cache: Optional[Tuple[str, float]] = None
+
+
+def fetch_cached_access_token() -> str:
+    """Fetch a cloud-platform access token, reusing a cached one until shortly before expiry.
+
+    Uses Application Default Credentials, falling back to the gcloud CLI.
+    """
+    global _access_token_cache
+    now = time.time()
+    if _access_token_cache and _access_token_cache[1] > now:
+        return _access_token_cache[0]
+
+    try:
+        if google_auth_requests is None:
+            raise RuntimeError("google-auth is not installed")
+
+        credentials = _default_credentials()
+        credentials.refresh(_auth_request())
+        access_token = credentials.token
+        # google-auth reports expiry as a naive UTC datetime
+        expires_at = (
+            credentials.expiry.replace(tzinfo=timezone.utc).timestamp()
+            if credentials.expiry
+            else now + ID_TOKEN_TTL_SECONDS
+        )
+    except Exception:
+        access_token = (
+            subprocess.check_output(
+                ["gcloud", "auth", "print-access-token"],
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+        expires_at = now + ID_TOKEN_TTL_SECONDS
+
+    _access_token_cache = (access_token, expires_at - ACCESS_TOKEN_REFRESH_MARGIN_SECONDS)
+    return access_token
+
+
+def create_pooled_session(retry_all_methods: bool = False) -> requests.Session:
+    """Create a requests.Session that keeps connections alive and retries transient failures.
+
+    Only idempotent methods are retried unless retry_all_methods is set.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=None if retry_all_methods else Retry.DEFAULT_ALLOWED_METHODS,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Shared by the sync clients so repeated calls reuse open TCP/TLS connections.
+# Generation calls are POSTs without side effects, so they are safe to retry.
+_SESSION = create_pooled_session(retry_all_methods=True)
+
+
+def create_async_client(timeout: float = 60) -> httpx.AsyncClient:
+    """Pooled HTTP/2 client, so concurrent requests to one host share a connection."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        timeout=timeout,
+    )
+
+
+def warm_up_connection(url: str):
+    """Open a pooled connection to url ahead of the first real request; failures are ignored."""
+    try:
+        _SESSION.head(url, timeout=5)
+    except requests.RequestException:
+        pass
+
+
+async def awarm_up_connection(client: httpx.AsyncClient, url: str):
+    """Async counterpart of warm_up_connection for a shared httpx client."""
+    try:
+        await client.head(url, timeout=5)
+    except httpx.HTTPError:
+        pass
+
+
+class PromptCache:
+    """Content-addressable cache of LLM responses, one JSON file per prompt.
+
+    Opt-in via LLM_CACHE_DIR. Entries are keyed by a hash of everything that
+    shapes the response (provider, model, sampling settings, prompt). Entries
+    older than ttl_seconds (LLM_CACHE_TTL_SECONDS), if set, count as misses.
+    """
+
+    def __init__(self, cache_dir: str, ttl_seconds: Optional[float] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def key(*fields: Any) -> str:
+        """Hash the fields, length-prefixing each so adjacent fields can't run together."""
+        digest = hashlib.sha256()
+        for field in fields:
+            if field is None:
+                data = b""
+            elif isinstance(field, bytes):
+                data = field
+            elif isinstance(field, float):
+                data = struct.pack(">d", field)
+            elif isinstance(field, str):
+                data = field.encode()
+            else:
+                data = orjson.dumps(field, default=dict, option=orjson.OPT_SORT_KEYS)
+            digest.update(struct.pack(">Q", len(data)))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self.cache_dir / f"{key}.json", "rb") as f:
+                entry = orjson.loads(f.read())
+            if self.ttl_seconds is not None:
+                created_at = datetime.fromisoformat(entry["created_at"])
+                age = datetime.now(timezone.utc) - created_at
+                if age.total_seconds() > self.ttl_seconds:
+                    return None
+            return entry["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, text: str):
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        entry = {"text": text, "created_at": datetime.now(timezone.utc).isoformat()}
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(entry))
+        # Atomic so concurrent writers never leave a partial entry behind
+        os.replace(tmp_path, path)
+
+
+@functools.lru_cache(maxsize=None)
+def _prompt_cache_for(cache_dir: str, ttl_seconds: Optional[float]) -> PromptCache:
+    return PromptCache(cache_dir, ttl_seconds)
+
+
+def get_prompt_cache() -> Optional[PromptCache]:
+    """Return the prompt cache configured by LLM_CACHE_DIR, if any."""
+    cache_dir = os.environ.get("LLM_CACHE_DIR")
+    if not cache_dir:
+        return None
+    ttl = os.environ.get("LLM_CACHE_TTL_SECONDS")
+    return _prompt_cache_for(cache_dir, float(ttl) if ttl else None)
+
+
 class LLMClient(Protocol):
     """Protocol defining interface for LLM clients."""
 
@@ -71,29 +303,120 @@ class LLMClient(Protocol):
 
 
 # Parsing and packaging functions (independent of client implementation)
+# Characters that change the scanner's state; everything else is skipped over
+_JSON_STRUCTURE = re.compile(r'[{}"\\]')
+_FENCE = "```"
+_JSON_CLOSERS = "}]"
+
+
+def _extract_json(text: str, start: int = 0) -> Optional[str]:
+    """Return the first balanced {...} object at or after start, or None.
+
+    A single linear pass tracks nesting depth and string/escape state, so
+    braces inside string values don't count. If the object never closes,
+    fall back to everything up to the last closing brace.
+    """
+    begin = text.find("{", start)
+    if begin == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped_pos = -1
+    for match in _JSON_STRUCTURE.finditer(text, begin):
+        pos = match.start()
+        if pos == escaped_pos:
+            continue
+        char = match.group()
+        if in_string:
+            if char == "\\":
+                escaped_pos = pos + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[begin : pos + 1]
+
+    end = text.rfind("}")
+    return text[begin : end + 1] if end > begin else None
+
+
 def clean_json_response(raw_text: str) -> str:
     """Clean JSON response by removing markdown blocks."""
-    # Handle ```json blocks - use greedy matching to get complete JSON
-    json_match = re.search(r"```json\s*(\{.*\})\s*```", raw_text, re.DOTALL)
-    if json_match:
-        return json_match.group(1).strip()
+    # Empty or brace-free output (e.g. a failed generation) has nothing to extract
+    if "{" not in raw_text:
+        return raw_text.strip()
+
+    # Prefer the object inside the first ``` fence over any earlier braces,
+    # but fall back to the whole text when the fence holds no object
+    start = raw_text.find(_FENCE)
+    json_text = _extract_json(raw_text, start) if start > 0 else None
+    if json_text is None:
+        json_text = _extract_json(raw_text)
+    if json_text is not None:
+        return json_text
 
-    # Handle ``` blocks - use greedy matching to get complete JSON
-    json_match = re.search(r"```\s*(\{.*\})\s*```", raw_text, re.DOTALL)
-    if json_match:
-        return json_match.group(1).strip()
+    return raw_text.strip()
 
-    # Look for JSON pattern - use greedy matching to get complete JSON
-    json_match = re.search(r"(\{.*\})", raw_text, re.DOTALL)
-    if json_match:
-        return json_match.group(1).strip()
 
-    return raw_text.strip()
+class StreamingJSONAccumulator:
+    """Collects streamed text chunks and parses them once they form a complete JSON object.
+
+    Only a buffer that ends like a finished document (a closing brace/bracket
+    or code fence) is joined and parsed, so a stream of n chunks costs one
+    or two parses rather than n.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self.parse_attempts = 0
+
+    def feed(self, chunk: str) -> Optional[Any]:
+        """Add a chunk; return the parsed object once the buffer holds complete JSON."""
+        self._chunks.append(chunk)
+        tail = chunk.rstrip()
+        if not tail:
+            return None
+        if tail[-1] not in _JSON_CLOSERS and not tail.endswith(_FENCE):
+            return None
+
+        self.parse_attempts += 1
+        try:
+            return orjson.loads(clean_json_response("".join(self._chunks)))
+        except orjson.JSONDecodeError:
+            return None
+
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+
+def is_agent_action(value: Any) -> bool:
+    """True if value decodes as the agent's next action (see agent.LLMResponse).
+
+    Used to decide when a streamed response is complete; any other JSON, such
+    as a brace-balanced fragment in preamble text, means the stream goes on.
+    """
+    if not isinstance(value, dict):
+        return False
+    # Imported here because the agent module imports this one
+    from .agent import LLMResponse
+
+    try:
+        LLMResponse.model_validate(value)
+    except msgspec.ValidationError:
+        return False
+    return True
 
 
 def parse_vertex_ai_response(response_data: Dict[str, Any]) -> LLMResponse:
     """Parse Google Vertex AI response format into LLMResponse."""
     text = ""
+    parsed = None
 
     try:
         # Standard Vertex AI format
@@ -102,16 +425,13 @@ def parse_vertex_ai_response(response_data: Dict[str, Any]) -> LLMResponse:
             if "content" in candidate and "parts" in candidate["content"]:
                 parts = candidate["content"]["parts"]
                 if parts and "text" in parts[0]:
-                    # The 'text' field might be a JSON string itself
-                    raw_text = parts[0]["text"]
+                    # The 'text' field might be a JSON string itself; keep it
+                    # verbatim and expose the decoded value alongside it
+                    text = parts[0]["text"]
                     try:
-                        # Attempt to parse it as JSON
-                        parsed_json = json.loads(raw_text)
-                        # If successful, we want the string representation of that JSON
-                        text = json.dumps(parsed_json, indent=2)
-                    except json.JSONDecodeError:
-                        # If it's not a valid JSON string, use the text as is
-                        text = raw_text
+                        parsed = orjson.loads(text)
+                    except orjson.JSONDecodeError:
+                        pass
 
         # Fallback formats
         elif "text" in response_data:
@@ -121,10 +441,10 @@ def parse_vertex_ai_response(response_data: Dict[str, Any]) -> LLMResponse:
         else:
             text = str(response_data)
     except Exception as e:
-        print(f"Error parsing Vertex AI response: {e}")
+        logger.warning("Error parsing Vertex AI response: %s", e)
         text = str(response_data)  # Return raw data on error
 
-    return LLMResponse(text=text, raw_data=response_data)
+    return LLMResponse(text=text, raw_data=response_data, parsed=parsed)
 
 
 def parse_ollama_response(response_data: Dict[str, Any]) -> LLMResponse:
@@ -141,9 +461,57 @@ def parse_ollama_response(response_data: Dict[str, Any]) -> LLMResponse:
     return LLMResponse(text=clean_json_response(text), raw_data=response_data)
 
 
+def extract_vertex_ai_text(document: Any) -> str:
+    """Pull the generated text out of a lazily parsed (simdjson) Vertex AI response.
+
+    Only the keys on the path to the text are touched, so the rest of the
+    document is never materialized into Python objects.
+    """
+    candidates = document.get("candidates")
+    if candidates:
+        content = candidates[0].get("content")
+        if content is not None:
+            parts = content.get("parts")
+            if parts and "text" in parts[0]:
+                return parts[0]["text"]
+        return ""
+
+    # Fallback formats
+    for key in ("text", "response"):
+        value = document.get(key)
+        if value is not None:
+            return value
+    return str(document.as_dict())
+
+
+def extract_ollama_text(document: Any) -> str:
+    """Pull the generated text out of a lazily parsed (simdjson) Ollama response."""
+    text = document.get("response")
+    if text is None:
+        text = document.get("content")
+    if text is None:
+        text = str(document.as_dict())
+    return clean_json_response(text)
+
+
+# Identical for every request, so encoded once and spliced into each payload by orjson
+_SAFETY_SETTINGS_JSON = orjson.Fragment(
+    orjson.dumps(
+        [
+            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "OFF"},
+            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "OFF"},
+            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "OFF"},
+            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "OFF"},
+        ]
+    )
+)
+_THINKING_CONFIG_JSON = orjson.Fragment(b'{"thinkingBudget":0}')
+_PERSONA_RESPONSE_SCHEMA_JSON = orjson.Fragment(orjson.dumps(PERSONA_RESPONSE_SCHEMA))
+
+
 def create_vertex_ai_payload(
     request: LLMRequest,
-    response_schema: Optional[Dict[str, Any]] = None,
+    response_schema: Optional[Mapping[str, Any]] = None,
     system_instruction: Optional[str] = None,
     include_thinking_config: bool = True,
 ) -> Dict[str, Any]:
@@ -157,21 +525,21 @@ def create_vertex_ai_payload(
     # Add structured output if schema provided
     if response_schema:
         generation_config["responseMimeType"] = "application/json"
-        generation_config["responseSchema"] = response_schema
+        # The persona schema goes out on every persona request, so reuse its encoding
+        generation_config["responseSchema"] = (
+            _PERSONA_RESPONSE_SCHEMA_JSON
+            if response_schema is PERSONA_RESPONSE_SCHEMA
+            else response_schema
+        )
     
     # Only add thinkingConfig for real Vertex AI, not for Gemma service
     if include_thinking_config:
-        generation_config["thinkingConfig"] = {"thinkingBudget": 0}
+        generation_config["thinkingConfig"] = _THINKING_CONFIG_JSON
 
     payload = {
         "contents": [{"role": "user", "parts": [{"text": request.prompt}]}],
         "generationConfig": generation_config,
-        "safetySettings": [
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "OFF"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "OFF"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "OFF"},
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "OFF"},
-        ],
+        "safetySettings": _SAFETY_SETTINGS_JSON,
     }
 
     # Add system instruction if provided
@@ -181,29 +549,89 @@ def create_vertex_ai_payload(
     return payload
 
 
-def create_ollama_payload(request: LLMRequest) -> Dict[str, Any]:
-    """Create payload for Ollama API format."""
-    return {"model": request.model, "prompt": request.prompt, "stream": False}
+def create_ollama_payload(request: LLMRequest, stream: bool = True) -> Dict[str, Any]:
+    """Create payload for Ollama API format.
+
+    Streaming makes Ollama emit one JSON object per line as tokens are generated.
+    """
+    return {"model": request.model, "prompt": request.prompt, "stream": stream}
+
+
+def gemma_urls_from_env() -> List[str]:
+    """Gemma endpoints from GEMMA_URLS (comma-separated), else GEMMA_URL or LLM_SERVICE_URL."""
+    urls = [url.strip() for url in os.environ.get("GEMMA_URLS", "").split(",")]
+    urls = [url for url in urls if url]
+    if not urls:
+        url = os.environ.get("GEMMA_URL") or os.environ.get("LLM_SERVICE_URL")
+        urls = [url] if url else []
+    return urls
+
+
+# Requests currently outstanding per Gemma endpoint, shared by every client in the process
+_gemma_in_flight: Counter = Counter()
+# Endpoints the shared session has already opened a connection to
+_warmed_up_urls: set = set()
 
 
 class LLMServiceClient:
     """Client for interacting with the deployed Gemma model using Google ADK pattern."""
 
-    def __init__(self):
-        # The URL is configured via environment variables (GEMMA_URL from deployment)
-        self.url = os.environ.get("GEMMA_URL") or os.environ.get("LLM_SERVICE_URL")
-        if not self.url:
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        # The URL is configured via environment variables (GEMMA_URL from deployment).
+        # Several deployments can be listed in GEMMA_URLS to spread concurrent sessions.
+        urls = gemma_urls_from_env()
+        if not urls:
             raise ValueError(
                 "GEMMA_URL or LLM_SERVICE_URL environment variable is not set."
             )
 
-        self.gemma_url = self.url.rstrip("/")
+        self.url = urls[0]
+        self.gemma_urls = [url.rstrip("/") for url in urls]
+        self.gemma_url = self.gemma_urls[0]
         self.model_name = "gemma3:12b"  # Using 12b model as requested
+        self._rotation = itertools.count()
+        self._stream_urls = {
+            url: f"{url}/v1beta/models/{self.model_name}:streamGenerateContent?alt=sse"
+            for url in self.gemma_urls
+        }
 
-        # Get authentication headers for Cloud Run service-to-service calls
-        self.auth_headers = self._get_auth_headers()
-
-    def _get_auth_headers(self):
+        # Get authentication headers for Cloud Run service-to-service calls.
+        # Identity tokens are per audience, so each endpoint gets its own.
+        self._auth_headers = {url: self._get_auth_headers(url) for url in self.gemma_urls}
+        self.auth_headers = self._auth_headers[self.gemma_url]
+
+        # Reused across calls so simdjson can recycle its internal buffers
+        self._parser = simdjson.Parser()
+        self._cache = get_prompt_cache()
+
+        # Async client so callers running inside an event loop don't block it.
+        # Prefer a shared, app-scoped client so connections are pooled across sessions;
+        # without one, a private client is created on the first async call, so
+        # sync-only users never build one.
+        self._owns_client = http_client is None
+        self._client = http_client
+
+    def warm_up(self):
+        """Open pooled connections to the Gemma endpoints in the background.
+
+        For standalone (CLI) use, so the first prompt doesn't pay the TLS handshake.
+        The API server warms its shared async client at startup instead. The session
+        is module-wide, so each endpoint is only warmed up once per process.
+        """
+        for url in self.gemma_urls:
+            if url in _warmed_up_urls:
+                continue
+            _warmed_up_urls.add(url)
+            threading.Thread(target=warm_up_connection, args=(url,), daemon=True).start()
+
+    @classmethod
+    async def acreate(
+        cls, http_client: Optional[httpx.AsyncClient] = None
+    ) -> "LLMServiceClient":
+        """Construct the client off the event loop, since a token fetch may block."""
+        return await asyncio.to_thread(cls, http_client)
+
+    def _get_auth_headers(self, audience: Optional[str] = None):
         """Get authentication headers for Cloud Run service-to-service calls (from starter)."""
         headers = {
             "Content-Type": "application/json",
@@ -212,50 +640,175 @@ class LLMServiceClient:
 
         # Try to get identity token for authenticated requests
         try:
-            import google.auth.transport.requests
-            import google.oauth2.id_token
-
-            auth_req = google.auth.transport.requests.Request()
-            id_token = google.oauth2.id_token.fetch_id_token(auth_req, self.gemma_url)
+            id_token = fetch_cached_id_token(audience or self.gemma_url)
             headers["Authorization"] = f"Bearer {id_token}"
-            print(f"Added Authorization header with identity token")
+            logger.debug("Added Authorization header with identity token")
         except Exception as e:
-            print(f"Warning: Could not get identity token: {e}")
+            logger.warning("Could not get identity token: %s", e)
             # If authentication fails, proceed without auth header (for local testing)
             pass
 
         return headers
 
+    def _acquire_url(self) -> str:
+        """Pick the endpoint with the fewest requests in flight, rotating between ties."""
+        if len(self.gemma_urls) == 1:
+            url = self.gemma_url
+        else:
+            offset = next(self._rotation) % len(self.gemma_urls)
+            candidates = self.gemma_urls[offset:] + self.gemma_urls[:offset]
+            url = min(candidates, key=_gemma_in_flight.__getitem__)
+        _gemma_in_flight[url] += 1
+        return url
+
+    def _release_url(self, url: str):
+        _gemma_in_flight[url] -= 1
+
     def invoke(self, prompt: str) -> str:
-        """Sends a prompt to the Gemma model using Vertex AI format from hackathon starter."""
+        """Sends a prompt to the Gemma model using Vertex AI format from hackathon starter.
+
+        The response is streamed and returned as soon as it holds a complete
+        agent action, without waiting for whatever the model generates after it.
+        """
         try:
-            print(f"Querying Gemma at: {self.gemma_url}")
-            print(f"Using model: {self.model_name}")
+            logger.debug("Using model: %s", self.model_name)
 
             # Create typed request
             request = LLMRequest(prompt=prompt, model=self.model_name)
 
-            # Use Vertex AI format as per hackathon starter, but exclude thinkingConfig for Gemma
-            payload = create_vertex_ai_payload(request, include_thinking_config=False)
-            endpoint_url = (
-                f"{self.gemma_url}/v1beta/models/{self.model_name}:generateContent"
-            )
+            cache_key = self._cache_key(request)
+            if cache_key:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+            accumulator = StreamingJSONAccumulator()
+            with contextlib.closing(self._stream(request)) as chunks:
+                for chunk in chunks:
+                    if is_agent_action(accumulator.feed(chunk)):
+                        break
+            text = accumulator.text()
+            if cache_key:
+                self._cache.set(cache_key, text)
+            return text
 
-            response = requests.post(
-                endpoint_url, headers=self.auth_headers, json=payload, timeout=60
-            )
-            response.raise_for_status()
+        except Exception as e:
+            logger.error("Could not invoke Gemma service: %s", e)
+            return '{"error": "Failed to communicate with the Gemma service."}'
 
-            # Parse response using typed response
-            response_data = response.json()
-            llm_response = parse_vertex_ai_response(response_data)
+    async def ainvoke(self, prompt: str) -> str:
+        """Async variant of invoke() that doesn't block the event loop."""
+        try:
+            logger.debug("Using model: %s", self.model_name)
 
-            return llm_response.text
+            request = LLMRequest(prompt=prompt, model=self.model_name)
+
+            cache_key = self._cache_key(request)
+            if cache_key:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+            accumulator = StreamingJSONAccumulator()
+            chunks = self._astream(request)
+            try:
+                async for chunk in chunks:
+                    if is_agent_action(accumulator.feed(chunk)):
+                        break
+            finally:
+                await chunks.aclose()
+            text = accumulator.text()
+            if cache_key:
+                self._cache.set(cache_key, text)
+            return text
 
         except Exception as e:
-            print(f"ERROR: Could not invoke Gemma service: {e}")
+            logger.error("Could not invoke Gemma service: %s", e)
             return '{"error": "Failed to communicate with the Gemma service."}'
 
+    async def ainvoke_batch(self, prompts: List[str]) -> List[str]:
+        """Invoke several independent prompts (e.g. one per persona) at once.
+
+        The requests are multiplexed over the client's HTTP/2 connections and
+        spread over the Gemma endpoints; results come back in prompt order.
+        """
+        return list(await asyncio.gather(*(self.ainvoke(prompt) for prompt in prompts)))
+
+    def invoke_stream(self, prompt: str) -> Iterator[str]:
+        """Yield response text chunks from Gemma as they are generated."""
+        return self._stream(LLMRequest(prompt=prompt, model=self.model_name))
+
+    def astream(self, prompt: str) -> AsyncIterator[str]:
+        """Async variant of invoke_stream()."""
+        return self._astream(LLMRequest(prompt=prompt, model=self.model_name))
+
+    def _stream(self, request: LLMRequest) -> Iterator[str]:
+        # Use Vertex AI format as per hackathon starter, but exclude thinkingConfig for Gemma
+        payload = create_vertex_ai_payload(request, include_thinking_config=False)
+
+        url = self._acquire_url()
+        try:
+            logger.debug("Streaming from Gemma at: %s", url)
+            with _SESSION.post(
+                self._stream_urls[url],
+                headers=self._auth_headers[url],
+                data=orjson.dumps(payload),
+                stream=True,
+                timeout=60,
+            ) as response:
+                response.raise_for_status()
+                # Server-sent events: one "data: {...}" line per chunk
+                for line in response.iter_lines():
+                    if line.startswith(b"data:"):
+                        chunk = self._read_event(line)
+                        if chunk:
+                            yield chunk
+        finally:
+            self._release_url(url)
+
+    async def _astream(self, request: LLMRequest) -> AsyncIterator[str]:
+        payload = create_vertex_ai_payload(request, include_thinking_config=False)
+
+        url = self._acquire_url()
+        try:
+            logger.debug("Streaming from Gemma at: %s", url)
+            async with self._get_client().stream(
+                "POST",
+                self._stream_urls[url],
+                headers=self._auth_headers[url],
+                content=orjson.dumps(payload),
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        chunk = self._read_event(line.encode())
+                        if chunk:
+                            yield chunk
+        finally:
+            self._release_url(url)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = create_async_client()
+        return self._client
+
+    def _read_event(self, line: bytes) -> str:
+        # Lazily parse the event and extract only the generated text
+        return extract_vertex_ai_text(self._parser.parse(line[5:].strip()))
+
+    def _cache_key(self, request: LLMRequest) -> Optional[str]:
+        if self._cache is None:
+            return None
+        return PromptCache.key(
+            "gemma", request.model, request.temperature, request.top_p, request.prompt
+        )
+
+    async def aclose(self):
+        """Close the underlying async HTTP client, unless it is shared."""
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 
 class OllamaClient:
     """Alternative client using Ollama API format."""
@@ -270,45 +823,59 @@ class OllamaClient:
             raise ValueError("GEMMA_URL must be provided")
 
         self.auth_headers = self._get_auth_headers()
+        self._parser = simdjson.Parser()
 
     def _get_auth_headers(self):
         """Get auth headers for Ollama."""
         headers = {"Content-Type": "application/json"}
         try:
-            import google.auth.transport.requests
-            import google.oauth2.id_token
-
-            auth_req = google.auth.transport.requests.Request()
-            id_token = google.oauth2.id_token.fetch_id_token(auth_req, self.gemma_url)
+            id_token = fetch_cached_id_token(self.gemma_url)
             headers["Authorization"] = f"Bearer {id_token}"
         except Exception as e:
-            print(f"Warning: Could not get identity token: {e}")
+            logger.warning("Could not get identity token: %s", e)
 
         return headers
 
+    def invoke_stream(self, prompt: str) -> Iterator[str]:
+        """Yield response text chunks from Ollama as they are generated."""
+        # Create typed request
+        request = LLMRequest(prompt=prompt, model=self.model_name)
+
+        # Use Ollama format
+        payload = create_ollama_payload(request, stream=True)
+        endpoint_url = f"{self.gemma_url}/api/generate"
+
+        with _SESSION.post(
+            endpoint_url,
+            headers=self.auth_headers,
+            data=orjson.dumps(payload),
+            stream=True,
+            timeout=60,
+        ) as response:
+            response.raise_for_status()
+            # One JSON object per line, the last one flagged "done"
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                text, done = self._read_chunk(line)
+                if text:
+                    yield text
+                if done:
+                    break
+
+    def _read_chunk(self, line: bytes) -> Tuple[Optional[str], bool]:
+        # Kept in its own frame so the parsed document is released before the
+        # next line reuses the parser
+        chunk = self._parser.parse(line)
+        return chunk.get("response"), bool(chunk.get("done"))
+
     def invoke(self, prompt: str) -> str:
         """Send prompt using Ollama format."""
         try:
-            # Create typed request
-            request = LLMRequest(prompt=prompt, model=self.model_name)
-
-            # Use Ollama format
-            payload = create_ollama_payload(request)
-            endpoint_url = f"{self.gemma_url}/api/generate"
-
-            response = requests.post(
-                endpoint_url, headers=self.auth_headers, json=payload, timeout=60
-            )
-            response.raise_for_status()
-
-            # Parse response using typed response
-            response_data = response.json()
-            llm_response = parse_ollama_response(response_data)
-
-            return llm_response.text
+            return clean_json_response("".join(self.invoke_stream(prompt)))
 
         except Exception as e:
-            print(f"ERROR: Could not invoke Ollama: {e}")
+            logger.error("Could not invoke Ollama: %s", e)
             return '{"error": "Failed to communicate with Ollama."}'
 
 
@@ -320,6 +887,7 @@ class VertexAIClient:
         project_id: Optional[str] = None,
         location: str = "global",
         model_name: str = "gemini-2.5-flash",
+        http_client: Optional[httpx.AsyncClient] = None,
     ):
         self.project_id = (
             project_id
@@ -335,70 +903,183 @@ class VertexAIClient:
             )
 
         self.endpoint_url = "https://aiplatform.googleapis.com"
+        # Fixed for the client's lifetime, so built once
+        model_url = f"{self.endpoint_url}/v1/projects/{self.project_id}/locations/{self.location}/publishers/google/models/{self.model_name}"
+        self._generate_url = f"{model_url}:generateContent"
+        self._stream_url = f"{model_url}:streamGenerateContent?alt=sse"
+        self._parser = simdjson.Parser()
+        self._http_client = http_client
+        self._cache = get_prompt_cache()
+
+    def _get_headers(self) -> Dict[str, str]:
+        """Build request headers with a cached access token, if one is available."""
+        try:
+            access_token = fetch_cached_access_token()
+            return {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            }
+        except Exception:
+            logger.warning("Could not get gcloud access token")
+            return {"Content-Type": "application/json"}
 
     def invoke(
         self,
         prompt: str,
-        response_schema: Optional[Dict[str, Any]] = None,
+        response_schema: Optional[Mapping[str, Any]] = None,
         system_instruction: Optional[str] = None,
     ) -> str:
         """Send prompt to Vertex AI and return response."""
         try:
-            print(f"Querying Vertex AI at: {self.endpoint_url}")
-            print(f"Using model: {self.model_name}")
+            logger.debug("Querying Vertex AI at: %s", self.endpoint_url)
+            logger.debug("Using model: %s", self.model_name)
 
             # Create typed request
             request = LLMRequest(prompt=prompt, model=self.model_name)
 
+            cache_key = self._cache_key(request, response_schema, system_instruction)
+            if cache_key:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
             # Use Vertex AI format with optional structured output and system instruction
             payload = create_vertex_ai_payload(
                 request, response_schema, system_instruction
             )
-            url = f"{self.endpoint_url}/v1/projects/{self.project_id}/locations/{self.location}/publishers/google/models/{self.model_name}:generateContent"
 
-            # Get access token using gcloud
-            import subprocess
+            response = _SESSION.post(
+                self._generate_url,
+                headers=self._get_headers(),
+                data=orjson.dumps(payload),
+                timeout=60,
+            )
+            response.raise_for_status()
+
+            # Parse response using typed response
+            response_data = orjson.loads(response.content)
+            logger.debug("Vertex AI response: %s", response_data)
+            llm_response = parse_vertex_ai_response(response_data)
+
+            if cache_key:
+                self._cache.set(cache_key, llm_response.text)
+            return llm_response.text
+
+        except Exception as e:
+            logger.error("Could not invoke Vertex AI: %s", e)
+            return '{"error": "Failed to communicate with Vertex AI."}'
+
+    async def ainvoke(
+        self,
+        prompt: str,
+        response_schema: Optional[Mapping[str, Any]] = None,
+        system_instruction: Optional[str] = None,
+    ) -> str:
+        """Async variant of invoke() so independent calls can run concurrently."""
+        try:
+            logger.debug("Querying Vertex AI at: %s", self.endpoint_url)
+
+            request = LLMRequest(prompt=prompt, model=self.model_name)
+
+            cache_key = self._cache_key(request, response_schema, system_instruction)
+            if cache_key:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    return cached
 
+            payload = create_vertex_ai_payload(
+                request, response_schema, system_instruction
+            )
+            # A token refresh may block, so it runs off the event loop
+            headers = await asyncio.to_thread(self._get_headers)
+
+            # Use the shared client when one was injected, else a short-lived one
+            client = self._http_client or httpx.AsyncClient(timeout=60)
             try:
-                access_token = (
-                    subprocess.check_output(
-                        ["gcloud", "auth", "print-access-token"],
-                        stderr=subprocess.DEVNULL,
-                    )
-                    .decode()
-                    .strip()
+                response = await client.post(
+                    self._generate_url, headers=headers, content=orjson.dumps(payload)
                 )
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {access_token}",
-                }
-            except subprocess.CalledProcessError:
-                print("Warning: Could not get gcloud access token")
-                headers = {"Content-Type": "application/json"}
-
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            finally:
+                if client is not self._http_client:
+                    await client.aclose()
             response.raise_for_status()
 
-            # Parse response using typed response
-            response_data = response.json()
-            print(f"DEBUG: Vertex AI response: {response_data}")
-            llm_response = parse_vertex_ai_response(response_data)
+            llm_response = parse_vertex_ai_response(orjson.loads(response.content))
 
+            if cache_key:
+                self._cache.set(cache_key, llm_response.text)
             return llm_response.text
 
         except Exception as e:
-            print(f"ERROR: Could not invoke Vertex AI: {e}")
+            logger.error("Could not invoke Vertex AI: %s", e)
             return '{"error": "Failed to communicate with Vertex AI."}'
 
+    def _cache_key(
+        self,
+        request: LLMRequest,
+        response_schema: Optional[Mapping[str, Any]],
+        system_instruction: Optional[str],
+    ) -> Optional[str]:
+        if self._cache is None:
+            return None
+        return PromptCache.key(
+            "vertex-ai",
+            request.model,
+            request.temperature,
+            request.top_p,
+            request.prompt,
+            response_schema,
+            system_instruction,
+        )
+
+    async def astream(
+        self,
+        prompt: str,
+        response_schema: Optional[Mapping[str, Any]] = None,
+        system_instruction: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream response text chunks from Vertex AI as they are generated."""
+        logger.debug("Streaming from Vertex AI at: %s", self.endpoint_url)
+
+        request = LLMRequest(prompt=prompt, model=self.model_name)
+        payload = create_vertex_ai_payload(request, response_schema, system_instruction)
+        # A token refresh may block, so it runs off the event loop
+        headers = await asyncio.to_thread(self._get_headers)
+
+        # Use the shared client when one was injected, else a short-lived one
+        client = self._http_client or httpx.AsyncClient(timeout=60)
+        try:
+            async with client.stream(
+                "POST",
+                self._stream_url,
+                headers=headers,
+                content=orjson.dumps(payload),
+            ) as response:
+                response.raise_for_status()
+                # Server-sent events: one "data: {...}" line per chunk
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    chunk = extract_vertex_ai_text(
+                        self._parser.parse(line[5:].strip().encode())
+                    )
+                    if chunk:
+                        yield chunk
+        finally:
+            if client is not self._http_client:
+                await client.aclose()
+
 
 class MockLLMClient:
     """Mock client for testing."""
 
     def invoke(self, prompt: str) -> str:
         """Return mock response."""
-        print(f"\n📤 MOCK LLM PROMPT:\n{'-'*50}")
-        print(prompt[:500] + "..." if len(prompt) > 500 else prompt)
-        print(f"{'-'*50}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "MOCK LLM PROMPT:\n%s",
+                prompt[:500] + "..." if len(prompt) > 500 else prompt,
+            )
 
         return '{"thought": "I need to start by seeing what products are available.", "tool_name": "get_products", "parameters": {}}'
 
@@ -2,10 +2,22 @@
 Orchestrator Service - Coordinates persona testing
 """
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 import os
+import orjson
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson, standing in for FastAPI's deprecated ORJSONResponse."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 
 app = FastAPI(
-    title="PersonaFlow Orchestrator", description="Coordinates AI persona testing"
+    title="PersonaFlow Orchestrator",
+    description="Coordinates AI persona testing",
+    default_response_class=ORJSONResponse,
 )
 
 # Service URLs from environment
@@ -13,19 +25,23 @@ MOCK_API_URL = os.getenv("MOCK_API_URL", "http://localhost:8001")
 LLM_SERVICE_URL = os.getenv("LLM_SERVICE_URL", "http://localhost:8003")
 
 
-@app.get("/health")
-async def health_check():
-    return {
+class PrebuiltJSONResponse(Response):
+    """Response for bodies that are already JSON bytes; the media type is fixed on the class."""
+
+    media_type = "application/json"
+
+
+# /health and / return constants, so their bodies are serialized once at import.
+_HEALTH_BODY = orjson.dumps(
+    {
         "status": "healthy",
         "service": "orchestrator",
         "mock_api_url": MOCK_API_URL,
         "llm_service_url": LLM_SERVICE_URL,
     }
-
-
-@app.get("/")
-async def root():
-    return {
+)
+_ROOT_BODY = orjson.dumps(
+    {
         "message": "PersonaFlow Orchestrator",
         "description": "Coordinates AI personas testing APIs",
         "endpoints": {
@@ -34,6 +50,17 @@ async def root():
             "run_test": "/test/run",
         },
     }
+)
+
+
+@app.get("/health")
+async def health_check():
+    return PrebuiltJSONResponse(_HEALTH_BODY)
+
+
+@app.get("/")
+async def root():
+    return PrebuiltJSONResponse(_ROOT_BODY)
 
 
 @app.post("/personas/generate")
@@ -1,30 +1,97 @@
 import requests
-import json
-from typing import Dict, Any
+import httpx
+import orjson
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
+
+from .clients import create_pooled_session
+
+# Keep-alive connections to the mock API are reused across every tool call
+_SESSION = create_pooled_session()
+# Upper bound on a single tool call, so a hung endpoint can't stall the agent
+TOOL_TIMEOUT_SECONDS = 30
+
+# Request bodies are serialized with orjson rather than the clients' stdlib json=
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Runs independent tool calls side by side; threads are only started on first use
+_TOOL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="toolbelt")
+
+
+# Built once; every agent prompt includes the same text
+TOOL_DESCRIPTIONS = "\n".join(
+    [
+        "get_products(): Lists all available products.",
+        "search_products(q: str): Searches for products by a query string.",
+        "add_to_cart(item_id: int, quantity: int): Adds a specific product to the cart.",
+        "get_cart(): Retrieves the current contents of the shopping cart.",
+        "get_product_total_cost(product_id: int): Gets the full cost of a single product, including all fees.",
+        "checkout(shipping_address: str, billing_address: str): Attempts to complete the purchase."
+        # We intentionally OMIT tools for flawed endpoints like /admin/users to see if the agent discovers them.
+    ]
+)
 
 
 class Toolbelt:
-    def __init__(self, api_base_url: str):
+    # The only methods the agent may call; anything else (e.g. _request) is rejected
+    TOOL_NAMES = frozenset(
+        {
+            "get_products",
+            "search_products",
+            "add_to_cart",
+            "get_cart",
+            "get_product_total_cost",
+            "checkout",
+        }
+    )
+
+    # Tool name -> name of its async mirror, for ause_tool
+    ASYNC_TOOL_NAMES = {name: f"a{name}" for name in TOOL_NAMES}
+
+    def __init__(
+        self,
+        api_base_url: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        session_id: Optional[str] = None,
+    ):
         self.base_url = api_base_url.rstrip("/")
+        # The mock API keeps one cart per X-Session-Id, so each Toolbelt (one per
+        # persona) gets its own cart even when personas run concurrently
+        self.session_id = session_id or uuid.uuid4().hex
+        self._headers = {"X-Session-Id": self.session_id}
+        self._json_headers = {**_JSON_HEADERS, **self._headers}
+        # Full tool URLs, built once rather than on every call
+        self._products_url = f"{self.base_url}/products"
+        self._search_url = f"{self.base_url}/search"
+        self._cart_add_url = f"{self.base_url}/cart/add"
+        self._cart_url = f"{self.base_url}/cart"
+        self._checkout_url = f"{self.base_url}/checkout"
+        self._total_cost_url = f"{self.base_url}/products/{{}}/total_cost".format
+        # Async tools use this client; pass a shared one to pool connections across agents
+        self._http_client = http_client
+        self._owns_client = http_client is None
+        # Bound tool methods by tool name, resolved once instead of per call
+        self._tools = {name: getattr(self, name) for name in self.TOOL_NAMES}
+        self._atools = {
+            name: getattr(self, async_name) for name, async_name in self.ASYNC_TOOL_NAMES.items()
+        }
+
+    async def aclose(self):
+        """Close the async HTTP client, unless it is shared."""
+        if self._owns_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
     def get_tool_descriptions(self) -> str:
-        descriptions = [
-            "get_products(): Lists all available products.",
-            "search_products(q: str): Searches for products by a query string.",
-            "add_to_cart(item_id: int, quantity: int): Adds a specific product to the cart.",
-            "get_cart(): Retrieves the current contents of the shopping cart.",
-            "get_product_total_cost(product_id: int): Gets the full cost of a single product, including all fees.",
-            "checkout(shipping_address: str, billing_address: str): Attempts to complete the purchase."
-            # We intentionally OMIT tools for flawed endpoints like /admin/users to see if the agent discovers them.
-        ]
-        return "\n".join(descriptions)
+        return TOOL_DESCRIPTIONS
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """A robust wrapper for making API calls."""
+    def _request(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
         try:
-            response = requests.request(method, f"{self.base_url}{endpoint}", **kwargs)
+            kwargs.setdefault("headers", self._headers)
+            response = _SESSION.request(method, url, timeout=TOOL_TIMEOUT_SECONDS, **kwargs)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except requests.exceptions.HTTPError as e:
             return {
                 "error": "HTTPError",
@@ -34,22 +101,43 @@ class Toolbelt:
         except Exception as e:
             return {"error": "Exception", "details": str(e)}
 
+    async def _arequest(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        """Async counterpart of _request that doesn't block the event loop."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=TOOL_TIMEOUT_SECONDS)
+        try:
+            kwargs.setdefault("headers", self._headers)
+            response = await self._http_client.request(method, url, **kwargs)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
+            return {
+                "error": "HTTPError",
+                "status_code": e.response.status_code,
+                "details": e.response.text,
+            }
+        except Exception as e:
+            return {"error": "Exception", "details": str(e)}
+
     def get_products(self) -> Dict[str, Any]:
-        return self._make_request("GET", "/products")
+        return self._request("GET", self._products_url)
 
     def search_products(self, q: str) -> Dict[str, Any]:
-        return self._make_request("GET", "/search", params={"q": q})
+        return self._request("GET", self._search_url, params={"q": q})
 
     def add_to_cart(self, item_id: int, quantity: int) -> Dict[str, Any]:
-        return self._make_request(
-            "POST", "/cart/add", json={"item_id": item_id, "quantity": quantity}
+        return self._request(
+            "POST",
+            self._cart_add_url,
+            data=orjson.dumps({"item_id": item_id, "quantity": quantity}),
+            headers=self._json_headers,
         )
 
     def get_cart(self) -> Dict[str, Any]:
-        return self._make_request("GET", "/cart")
+        return self._request("GET", self._cart_url)
 
     def get_product_total_cost(self, product_id: int) -> Dict[str, Any]:
-        return self._make_request("GET", f"/products/{product_id}/total_cost")
+        return self._request("GET", self._total_cost_url(product_id))
 
     def checkout(self, shipping_address: str, billing_address: str) -> Dict[str, Any]:
         # Note: The agent doesn't know about tax_id yet. This will cause a failure.
@@ -57,13 +145,63 @@ class Toolbelt:
             "shipping_address": shipping_address,
             "billing_address": billing_address,
         }
-        return self._make_request("POST", "/checkout", json=data)
+        return self._request(
+            "POST", self._checkout_url, data=orjson.dumps(data), headers=self._json_headers
+        )
+
+    # Async mirrors of the tools, for agents running inside an event loop
+    async def aget_products(self) -> Dict[str, Any]:
+        return await self._arequest("GET", self._products_url)
+
+    async def asearch_products(self, q: str) -> Dict[str, Any]:
+        return await self._arequest("GET", self._search_url, params={"q": q})
+
+    async def aadd_to_cart(self, item_id: int, quantity: int) -> Dict[str, Any]:
+        return await self._arequest(
+            "POST",
+            self._cart_add_url,
+            content=orjson.dumps({"item_id": item_id, "quantity": quantity}),
+            headers=self._json_headers,
+        )
+
+    async def aget_cart(self) -> Dict[str, Any]:
+        return await self._arequest("GET", self._cart_url)
+
+    async def aget_product_total_cost(self, product_id: int) -> Dict[str, Any]:
+        return await self._arequest("GET", self._total_cost_url(product_id))
+
+    async def acheckout(self, shipping_address: str, billing_address: str) -> Dict[str, Any]:
+        data = {
+            "shipping_address": shipping_address,
+            "billing_address": billing_address,
+        }
+        return await self._arequest(
+            "POST", self._checkout_url, content=orjson.dumps(data), headers=self._json_headers
+        )
 
     def use_tool(self, tool_name: str, parameters: Dict[str, Any]) -> str:
         """The single entry point for the agent to use a tool."""
-        if not hasattr(self, tool_name):
-            return json.dumps({"error": f"Tool '{tool_name}' not found."})
+        tool_function = self._tools.get(tool_name)
+        if tool_function is None:
+            return orjson.dumps({"error": f"Tool '{tool_name}' not found."}).decode()
 
-        tool_function = getattr(self, tool_name)
         result = tool_function(**parameters)
-        return json.dumps(result, indent=2)
+        # Compact: the result goes back into the LLM prompt, where indentation only costs tokens
+        return orjson.dumps(result).decode()
+
+    def use_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Run independent tool calls concurrently, returning results in call order."""
+        futures = [
+            _TOOL_POOL.submit(self.use_tool, tool_name, parameters)
+            for tool_name, parameters in calls
+        ]
+        return [future.result() for future in futures]
+
+    async def ause_tool(self, tool_name: str, parameters: Dict[str, Any]) -> str:
+        """Async entry point for the agent to use a tool."""
+        tool_function = self._atools.get(tool_name)
+        if tool_function is None:
+            return orjson.dumps({"error": f"Tool '{tool_name}' not found."}).decode()
+
+        result = await tool_function(**parameters)
+        return orjson.dumps(result).decode()
@@ -35,6 +35,7 @@ if __name__ == "__main__":
     if USE_REAL_LLM:
         print("🧠 Using real Gemma model")
         llm_client = LLMServiceClient()
+        llm_client.warm_up()
     else:
         print("🤖 Using mock LLM client (manual input)")
         llm_client = MockLLMClient()
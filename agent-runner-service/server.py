@@ -2,12 +2,20 @@
 """
 Orchestrator Service Entry Point
 """
+import os
 import uvicorn
 from app.orchestrator import app
 
 if __name__ == "__main__":
-    # For local development
-    uvicorn.run(app, host="0.0.0.0", port=8002, reload=True)
+    # uvloop and httptools come with uvicorn[standard]; reload only for local development
+    uvicorn.run(
+        "app.orchestrator:app",
+        host="0.0.0.0",
+        port=8002,
+        loop="uvloop",
+        http="httptools",
+        reload=os.environ.get("DEV") == "1",
+    )
 else:
     # For production/Cloud Run
     # This module will be imported by uvicorn
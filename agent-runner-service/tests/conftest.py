@@ -0,0 +1,60 @@
+import os
+import pytest
+from pathlib import Path
+
+# Opt-in: PERSONA_FLOW_LLM_CACHE=1 replays real LLM responses (e.g. the
+# Architect's Vertex AI calls) from disk on re-runs. Leave it unset to force
+# fresh calls, as CI should.
+LLM_TEST_CACHE_DIR = Path(__file__).parent.parent / ".pytest_llm_cache"
+LLM_TEST_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def pytest_configure(config):
+    # Service URLs and credentials come from the repo-root .env, loaded once per run
+    # rather than by each test module; existing environment variables win.
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / ".env")
+
+    # Set before any client is constructed, since clients read it in __init__
+    if os.environ.get("PERSONA_FLOW_LLM_CACHE") == "1":
+        os.environ.setdefault("LLM_CACHE_DIR", str(LLM_TEST_CACHE_DIR))
+        os.environ.setdefault(
+            "LLM_CACHE_TTL_SECONDS", str(LLM_TEST_CACHE_TTL_SECONDS)
+        )
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-integration",
+        action="store_true",
+        help="run tests marked integration, which call real LLM/API services",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-integration"):
+        return
+    skip_integration = pytest.mark.skip(reason="needs --run-integration")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip_integration)
+
+
+@pytest.fixture(scope="session")
+def toolbelt():
+    """One Toolbelt against the deployed mock API, shared by the tests that call it."""
+    mock_api_url = os.environ.get("MOCK_API_URL")
+    if not mock_api_url:
+        pytest.skip("MOCK_API_URL not set - skipping real integration test")
+    from app.toolbelt import Toolbelt
+
+    return Toolbelt(api_base_url=mock_api_url)
+
+
+@pytest.fixture(scope="session")
+def architect():
+    """One Architect (and Vertex AI client) shared by every test in the run."""
+    from app.architect import Architect
+
+    return Architect()
@@ -1,13 +1,51 @@
 import json
+import asyncio
 import pytest
-from app.architect import Architect, TestResult
+from concurrent.futures import ThreadPoolExecutor
+from app.architect import Architect, TestResult, _compact_log, _format_log_table
 from app.personas import Persona
 
 
+# Shared, read-only inputs for the report tests; TestResult is frozen
+@pytest.fixture(scope="module")
+def step_log_results():
+    return (
+        TestResult(
+            persona_name="Casey",
+            log=[
+                {
+                    "step": 1,
+                    "thought": "Search failed",
+                    "tool_name": "search_products",
+                }
+            ],
+            was_successful=False,
+        ),
+        TestResult(
+            persona_name="Paula",
+            log=[{"step": 1, "thought": "API is slow", "tool_name": "get_products"}],
+            was_successful=True,
+        ),
+    )
+
+
+@pytest.fixture(scope="module")
+def multi_persona_results():
+    return (
+        TestResult(persona_name="Casey", log=[{"action": "search"}], was_successful=False),
+        TestResult(persona_name="Paula", log=[{"action": "browse"}], was_successful=True),
+        TestResult(persona_name="Alex", log=[{"action": "checkout"}], was_successful=False),
+    )
+
+
+@pytest.fixture(scope="module")
+def single_empty_result():
+    return (TestResult(persona_name="Test", log=[], was_successful=True),)
+
+
+@pytest.mark.integration
 class TestArchitectPersonaGeneration:
-    def test_generate_personas_returns_list(self):
-        architect = Architect()
-
+    def test_generate_personas_returns_list(self, architect):
         result = architect.generate_personas(
             "Budget-conscious online shoppers", num_personas=2
         )
@@ -16,21 +54,18 @@ class TestArchitectPersonaGeneration:
         assert len(result) >= 0
 
         if result:
-            assert all(isinstance(persona, Persona) for persona in result)
-            assert all(hasattr(persona, "name") for persona in result)
-            assert all(hasattr(persona, "system_prompt") for persona in result)
-            assert all(len(persona.name) > 0 for persona in result)
-            assert all(len(persona.system_prompt) > 0 for persona in result)
-
-    def test_generate_personas_with_different_market_segments(self):
-        architect = Architect()
-
-        tech_result = architect.generate_personas(
-            "Technical software developers", num_personas=1
-        )
-
-        casual_result = architect.generate_personas(
-            "Non-technical everyday users", num_personas=1
+            # One pass; a missing attribute raises AttributeError
+            for persona in result:
+                assert isinstance(persona, Persona)
+                assert persona.name
+                assert persona.system_prompt
+
+    @pytest.mark.asyncio
+    async def test_generate_personas_with_different_market_segments(self, architect):
+        # Independent requests, so they run concurrently
+        tech_result, casual_result = await architect.agenerate_personas_batch(
+            ["Technical software developers", "Non-technical everyday users"],
+            num_personas=1,
         )
 
         assert isinstance(tech_result, list)
@@ -39,9 +74,7 @@ class TestArchitectPersonaGeneration:
         if tech_result and casual_result:
             assert tech_result[0].name != casual_result[0].name
 
-    def test_generate_personas_respects_num_personas_parameter(self):
-        architect = Architect()
-
+    def test_generate_personas_respects_num_personas_parameter(self, architect):
         result = architect.generate_personas("E-commerce users", num_personas=3)
 
         assert isinstance(result, list)
@@ -50,84 +83,96 @@ class TestArchitectPersonaGeneration:
             print(f"Requested 3 personas, got {len(result)}")
             assert len(result) == 3, f"Expected 3 personas, got {len(result)}"
 
-    def test_generate_personas_single_vs_multiple(self):
-        architect = Architect()
+    @pytest.mark.asyncio
+    async def test_generate_personas_single_vs_multiple(self, architect):
+        single_result, multi_result = await asyncio.gather(
+            architect.agenerate_personas("Tech enthusiasts", num_personas=1),
+            architect.agenerate_personas("Online shoppers", num_personas=2),
+        )
 
-        single_result = architect.generate_personas("Tech enthusiasts", num_personas=1)
         if single_result:
             assert (
                 len(single_result) == 1
             ), f"Expected 1 persona, got {len(single_result)}"
 
-        multi_result = architect.generate_personas("Online shoppers", num_personas=2)
         if multi_result:
             assert (
                 len(multi_result) == 2
             ), f"Expected 2 personas, got {len(multi_result)}"
 
 
-class TestArchitectReportSynthesis:
-    def test_synthesize_report_returns_string(self):
-        test_results = [
-            TestResult(
-                persona_name="Casey",
-                log=[
-                    {
-                        "step": 1,
-                        "thought": "Search failed",
-                        "tool_name": "search_products",
-                    }
-                ],
-                was_successful=False,
-            ),
-            TestResult(
-                persona_name="Paula",
-                log=[
-                    {"step": 1, "thought": "API is slow", "tool_name": "get_products"}
-                ],
-                was_successful=True,
-            ),
-        ]
+class TestReportLogFormat:
+    def test_report_log_is_written_column_wise(self):
+        table = _format_log_table(
+            [
+                {"role": "user", "content": "Find a mouse"},
+                {"role": "assistant", "content": "a|b", "step": 2},
+            ]
+        )
 
-        architect = Architect()
-        result = architect.synthesize_report("Find wireless mouse", test_results)
+        assert table == (
+            "columns: [role, content, step]\n"
+            "rows:\n"
+            '"user"|"Find a mouse"|null\n'
+            '"assistant"|"a|b"|2'
+        )
+
+    def test_report_log_keeps_the_clipped_tail(self):
+        log = [{"role": "tool_observation", "content": str(i)} for i in range(30)]
+        log.append({"role": "tool_observation", "content": "x" * 1000})
+
+        compact = _compact_log(log)
+
+        assert len(compact) == 20
+        assert compact[0]["content"] == "11"
+        assert compact[-1]["content"] == "x" * 500 + "..."
 
-        assert isinstance(result, str)
-        assert len(result) > 0
 
-    def test_synthesize_report_with_multiple_personas(self):
-        test_results = [
-            TestResult(
-                persona_name="Casey", log=[{"action": "search"}], was_successful=False
-            ),
-            TestResult(
-                persona_name="Paula", log=[{"action": "browse"}], was_successful=True
-            ),
-            TestResult(
-                persona_name="Alex", log=[{"action": "checkout"}], was_successful=False
-            ),
-        ]
+class _FailingStreamClient:
+    async def astream(self, prompt):
+        yield "### Executive"
+        raise RuntimeError("503 Service Unavailable")
 
+
+class TestReportStreamingErrors:
+    @pytest.mark.asyncio
+    async def test_stream_failure_returns_error_report(self, monkeypatch, single_empty_result):
+        monkeypatch.setenv("HACKATHON_PROJECT_ID", "test-project")
         architect = Architect()
-        result = architect.synthesize_report("Test goal", test_results)
+        architect.client = _FailingStreamClient()
+
+        report = await architect.asynthesize_report("Any goal", single_empty_result)
+
+        assert json.loads(report) == {"error": "Failed to communicate with Vertex AI."}
+
+
+@pytest.mark.integration
+class TestArchitectReportSynthesis:
+    def test_synthesize_report_returns_string(self, architect, step_log_results):
+        result = architect.synthesize_report("Find wireless mouse", step_log_results)
 
         assert isinstance(result, str)
         assert len(result) > 0
 
-    def test_synthesize_report_handles_empty_results(self):
-        architect = Architect()
-        result = architect.synthesize_report("Empty goal", [])
+    def test_synthesize_report_with_multiple_personas(self, architect, multi_persona_results):
+        result = architect.synthesize_report("Test goal", multi_persona_results)
 
         assert isinstance(result, str)
         assert len(result) > 0
 
-    def test_synthesize_report_with_different_goals(self):
-        test_results = [TestResult(persona_name="Test", log=[], was_successful=True)]
+    def test_synthesize_report_handles_empty_results(self, architect):
+        result = architect.synthesize_report("Empty goal", [])
 
-        architect = Architect()
+        assert isinstance(result, str)
+        assert len(result) > 0
 
-        result1 = architect.synthesize_report("Buy premium headphones", test_results)
-        result2 = architect.synthesize_report("Find budget electronics", test_results)
+    def test_synthesize_report_with_different_goals(self, architect, single_empty_result):
+        # The sync client releases the GIL while waiting, so threads overlap the calls
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            result1, result2 = pool.map(
+                lambda goal: architect.synthesize_report(goal, single_empty_result),
+                ["Buy premium headphones", "Find budget electronics"],
+            )
 
         assert isinstance(result1, str)
         assert isinstance(result2, str)
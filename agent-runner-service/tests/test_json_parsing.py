@@ -1,6 +1,6 @@
 import pytest
 import json
-from app.clients import clean_json_response
+from app.clients import clean_json_response, StreamingJSONAccumulator
 from app.agent import LLMResponse
 
 
@@ -233,6 +233,41 @@ Some text
         assert parsed["parameters"]["item_id"] == "123"
         assert parsed["parameters"]["metadata"]["source"] == "search"
 
+    def test_clean_json_response_keeps_object_before_fence_without_json(self):
+        """Test that a code fence holding no JSON doesn't hide an earlier object."""
+        raw_text = 'Here: {"a": 1}\n```\nno json\n```'
+
+        cleaned = clean_json_response(raw_text)
+
+        assert json.loads(cleaned) == {"a": 1}
+
+    def test_clean_json_response_ignores_trailing_text_with_braces(self):
+        """Test that text after the JSON object doesn't get pulled into it."""
+        raw_text = '''{"thought": "Searching now.", "tool_name": "search_products", "parameters": {"q": "mouse"}}
+I used {curly braces} in my explanation.'''
+
+        cleaned = clean_json_response(raw_text)
+        parsed = json.loads(cleaned)
+
+        assert parsed["tool_name"] == "search_products"
+        assert parsed["parameters"] == {"q": "mouse"}
+
+    def test_streaming_accumulator_parses_only_complete_buffers(self):
+        """Test that a chunked stream is parsed once it closes, not once per chunk."""
+        payload = '{"thought": "Looking for a mouse.", "tool_name": "search_products", "parameters": {"q": "mouse"}}'
+        chunks = [payload[i : i + 5] for i in range(0, len(payload), 5)]
+
+        accumulator = StreamingJSONAccumulator()
+        results = [accumulator.feed(chunk) for chunk in chunks]
+
+        assert all(result is None for result in results[:-1])
+        assert results[-1]["tool_name"] == "search_products"
+        # Only chunks ending in a closing brace trigger a parse
+        assert accumulator.parse_attempts <= sum(
+            chunk.rstrip().endswith("}") for chunk in chunks
+        )
+        assert accumulator.parse_attempts < len(chunks) // 4
+
 
 if __name__ == "__main__":
     # Run tests if executed directly
@@ -1,6 +1,6 @@
 import pytest
 import os
-from app.clients import LLMServiceClient
+from app.clients import LLMServiceClient, PromptCache
 
 
 class TestLLMServiceClient:
@@ -27,6 +27,20 @@ class TestLLMServiceClient:
         client = LLMServiceClient()
         assert client.url == test_url
 
+    def test_llm_client_spreads_requests_over_gemma_urls(self, monkeypatch):
+        monkeypatch.setenv("GEMMA_URLS", "https://gemma-a.run.app, https://gemma-b.run.app/")
+
+        client = LLMServiceClient()
+        assert client.gemma_urls == ["https://gemma-a.run.app", "https://gemma-b.run.app"]
+
+        # With one request outstanding, the next goes to the idle endpoint
+        first = client._acquire_url()
+        second = client._acquire_url()
+        assert {first, second} == set(client.gemma_urls)
+
+        client._release_url(first)
+        client._release_url(second)
+
     def test_llm_client_invoke_returns_string(self, monkeypatch):
         test_url = "https://test-gemma.run.app"
         monkeypatch.setenv("GEMMA_URL", test_url)
@@ -36,6 +50,46 @@ class TestLLMServiceClient:
         assert hasattr(client, "invoke")
         assert callable(client.invoke)
 
+    def test_llm_client_invoke_reads_past_non_action_json(self, monkeypatch):
+        monkeypatch.setenv("GEMMA_URL", "https://test-gemma.run.app")
+        client = LLMServiceClient()
+        client._cache = None
+
+        action = '{"thought": "Find it.", "tool_name": "get_products", "parameters": {}}'
+        chunks = ['Plan: {"step": 1}', "\n", action, "\nDone."]
+        read = []
+
+        def fake_stream(request):
+            for chunk in chunks:
+                read.append(chunk)
+                yield chunk
+
+        monkeypatch.setattr(client, "_stream", fake_stream)
+
+        # The preamble's JSON isn't an action, so the whole stream is read
+        assert client.invoke("prompt") == "".join(chunks)
+        assert read == chunks
+
+    def test_llm_client_invoke_stops_after_complete_action(self, monkeypatch):
+        monkeypatch.setenv("GEMMA_URL", "https://test-gemma.run.app")
+        client = LLMServiceClient()
+        client._cache = None
+
+        action = '{"thought": "Find it.", "tool_name": "get_products", "parameters": {}}'
+        chunks = [action[:20], action[20:], "\nAnything after is never read."]
+        read = []
+
+        def fake_stream(request):
+            for chunk in chunks:
+                read.append(chunk)
+                yield chunk
+
+        monkeypatch.setattr(client, "_stream", fake_stream)
+
+        assert client.invoke("prompt") == action
+        assert read == chunks[:2]
+
+    @pytest.mark.integration
     def test_llm_client_with_real_gemma_endpoint(self):
         gemma_url = os.environ.get("GEMMA_URL")
         if not gemma_url:
@@ -51,6 +105,7 @@ class TestLLMServiceClient:
         assert len(result.strip()) > 0
         print(f"Simple Gemma response: {result}")
 
+    @pytest.mark.integration
     def test_llm_client_with_persona_prompt(self):
         gemma_url = os.environ.get("GEMMA_URL")
         if not gemma_url:
@@ -83,3 +138,20 @@ class TestLLMServiceClient:
 
         result_lower = result.lower()
         assert "thought" in result_lower or "tool" in result_lower
+
+
+class TestPromptCache:
+    def test_prompt_cache_round_trip(self, tmp_path):
+        cache = PromptCache(str(tmp_path))
+        key = PromptCache.key("gemma", "gemma3:12b", 1.0, 1.0, "Hello")
+
+        assert cache.get(key) is None
+        cache.set(key, '{"thought": "hi"}')
+        assert cache.get(key) == '{"thought": "hi"}'
+
+    def test_prompt_cache_key_is_unambiguous(self):
+        # Length prefixes keep shifted field boundaries from colliding
+        assert PromptCache.key("ab", "c") != PromptCache.key("a", "bc")
+        assert PromptCache.key("gemma", "m", 1.0, 1.0, "p") != PromptCache.key(
+            "gemma", "m", 0.5, 1.0, "p"
+        )
@@ -1,17 +1,33 @@
+import asyncio
 import pytest
 import os
 import json
-from pathlib import Path
-from dotenv import load_dotenv
 from app.agent import Agent, LLMResponse
 from app.personas import CASUAL_SHOPPER, POWER_USER
 from app.toolbelt import Toolbelt
-from app.clients import LLMServiceClient
 
-# Load environment variables from .env file in root directory
-root_dir = Path(__file__).parent.parent.parent
-dotenv_path = root_dir / ".env"
-load_dotenv(dotenv_path=dotenv_path)
+
+# Scripted replies, one per call; the last one repeats. Serialized once at import.
+MOCK_LLM_RESPONSES = tuple(
+    json.dumps(response)
+    for response in (
+        {
+            "thought": "I need to search for a wireless mouse since that's my goal.",
+            "tool_name": "search_products",
+            "parameters": {"q": "wireless mouse"},
+        },
+        {
+            "thought": "The search didn't find anything. Let me try with proper capitalization.",
+            "tool_name": "search_products",
+            "parameters": {"q": "Wireless Mouse"},
+        },
+        {
+            "thought": "Great! I found the mouse. Let me add it to my cart.",
+            "tool_name": "add_to_cart",
+            "parameters": {"item_id": 2, "quantity": 1},
+        },
+    )
+)
 
 
 class MockLLMClientForTesting:
@@ -19,33 +35,10 @@ class MockLLMClientForTesting:
         self.call_count = 0
 
     def invoke(self, prompt: str) -> str:
-        self.call_count += 1
-
         # Return different responses based on call count for testing
-        if self.call_count == 1:
-            return """
-                {
-                "thought": "I need to search for a wireless mouse since that's my goal.",
-                "tool_name": "search_products",
-                "parameters": {"q": "wireless mouse"}
-                }
-            """
-        elif self.call_count == 2:
-            return """
-                    {
-                    "thought": "The search didn't find anything. Let me try with proper capitalization.",
-                    "tool_name": "search_products", 
-                    "parameters": {"q": "Wireless Mouse"}
-                    }
-                """
-        else:
-            return """
-                    {
-                    "thought": "Great! I found the mouse. Let me add it to my cart.",
-                    "tool_name": "add_to_cart",
-                    "parameters": {"item_id": 2, "quantity": 1}
-                    }
-                """
+        response = MOCK_LLM_RESPONSES[min(self.call_count, len(MOCK_LLM_RESPONSES) - 1)]
+        self.call_count += 1
+        return response
 
 
 class TestPersonaFlow:
@@ -125,13 +118,9 @@ class TestPersonaFlow:
         assert "tool_name" in llm_output
         assert "search_products" in llm_output
 
-    def test_persona_flow_with_real_mock_api(self):
-        mock_api_url = os.environ.get("MOCK_API_URL")
-        if not mock_api_url:
-            pytest.skip("MOCK_API_URL not set - skipping real API integration test")
-
+    @pytest.mark.integration
+    def test_persona_flow_with_real_mock_api(self, toolbelt):
         persona = CASUAL_SHOPPER
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
         llm_client = MockLLMClientForTesting()
 
         agent = Agent(persona=persona, toolbelt=toolbelt, llm_client=llm_client)
@@ -154,17 +143,18 @@ class TestPersonaFlow:
         assert tool_result is not None
         assert len(tool_result) > 0
 
-    def test_persona_discovers_case_sensitivity_flaw(self):
-        mock_api_url = os.environ.get("MOCK_API_URL")
-        if not mock_api_url:
-            pytest.skip("MOCK_API_URL not set - skipping flaw discovery test")
-
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
-
+    @pytest.mark.integration
+    @pytest.mark.asyncio
+    async def test_persona_discovers_case_sensitivity_flaw(self, toolbelt):
         # Simulate persona discovering the flaw through different searches
         # Note: toolbelt methods return dict, use_tool returns JSON string
-        lowercase_data = toolbelt.search_products("wireless mouse")
-        capitalized_data = toolbelt.search_products("Wireless Mouse")
+        try:
+            lowercase_data, capitalized_data = await asyncio.gather(
+                toolbelt.asearch_products("wireless mouse"),
+                toolbelt.asearch_products("Wireless Mouse"),
+            )
+        finally:
+            await toolbelt.aclose()
 
         print(f"Lowercase search: {len(lowercase_data['results'])} results")
         print(f"Capitalized search: {len(capitalized_data['results'])} results")
@@ -175,13 +165,10 @@ class TestPersonaFlow:
         # Specifically, lowercase should return 0 (the strategic flaw)
         assert len(lowercase_data["results"]) == 0
 
-    def test_persona_discovers_cart_inconsistency_flaw(self):
-        mock_api_url = os.environ.get("MOCK_API_URL")
-        if not mock_api_url:
-            pytest.skip("MOCK_API_URL not set - skipping cart inconsistency test")
-
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
-
+    @pytest.mark.integration
+    def test_persona_discovers_cart_inconsistency_flaw(self, toolbelt):
+        # A fresh Toolbelt has its own session id, so this test gets an empty cart
+        toolbelt = Toolbelt(api_base_url=toolbelt.base_url)
         # Simulate persona adding items to cart multiple times
         # Note: toolbelt methods return dict directly
         first_data = toolbelt.add_to_cart(item_id=1, quantity=1)
@@ -194,7 +181,7 @@ class TestPersonaFlow:
         assert "cart" in first_data
         assert "cart" not in second_data  # Inconsistent!
 
-    @pytest.skip(reason = "Integration Test")
+    @pytest.mark.integration
     def test_raw_gemma_response_structure(self):
         ## Need this to see what the raw response looks like.
         mock_api_url = os.environ.get("MOCK_API_URL")
@@ -207,6 +194,8 @@ class TestPersonaFlow:
 
         persona = CASUAL_SHOPPER
         toolbelt = Toolbelt(api_base_url=mock_api_url)  # Use REAL Mock API
+        from app.clients import LLMServiceClient
+
         llm_client = LLMServiceClient()
 
         agent = Agent(persona=persona, toolbelt=toolbelt, llm_client=llm_client)
@@ -232,16 +221,25 @@ class TestPersonaFlow:
         print(f"Contains 'tool_name': {'tool_name' in raw_response}")
         print(f"Contains narrative text: {not raw_response.strip().startswith('{')}")
 
-        # Try to identify JSON boundaries
-        import re
-
-        json_matches = list(re.finditer(r"\{.*?\}", raw_response, re.DOTALL))
-        print(f"JSON blocks found: {len(json_matches)}")
-
-        for i, match in enumerate(json_matches):
-            print(f"JSON block {i+1}: characters {match.start()}-{match.end()}")
-            print(f"Content: {match.group()[:]}..")
-    @pytest.skip(reason="Integration test")
+        # Try to identify JSON boundaries: decode each complete object in one pass
+        decoder = json.JSONDecoder()
+        json_blocks = []
+        idx = raw_response.find("{")
+        while idx != -1:
+            try:
+                _, end = decoder.raw_decode(raw_response, idx)
+            except json.JSONDecodeError:
+                idx = raw_response.find("{", idx + 1)
+                continue
+            json_blocks.append((idx, end))
+            idx = raw_response.find("{", end)
+        print(f"JSON blocks found: {len(json_blocks)}")
+
+        for i, (start, end) in enumerate(json_blocks):
+            print(f"JSON block {i+1}: characters {start}-{end}")
+            print(f"Content: {raw_response[start:end]}..")
+
+    @pytest.mark.integration
     def test_full_agent_run_with_deployed_services(self):
         mock_api_url = os.environ.get("MOCK_API_URL")
         gemma_url = os.environ.get("GEMMA_URL")
@@ -254,6 +252,8 @@ class TestPersonaFlow:
 
         if gemma_url:
             print("Using real Gemma model")
+            from app.clients import LLMServiceClient
+
             llm_client = LLMServiceClient()
         else:
             print("Using mock LLM client")
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import os
 import json
@@ -16,6 +17,16 @@ class TestToolbeltIntegration:
         toolbelt = Toolbelt(api_base_url=api_url)
         assert toolbelt.base_url == "https://test-mock-api.run.app"
 
+    def test_toolbelts_send_their_own_session_id(self):
+        api_url = "https://test-mock-api.run.app"
+        first, second = Toolbelt(api_base_url=api_url), Toolbelt(api_base_url=api_url)
+        named = Toolbelt(api_base_url=api_url, session_id="session-1-0")
+
+        # Each persona's toolbelt gets its own cart on the mock API
+        assert first.session_id != second.session_id
+        assert named._headers == {"X-Session-Id": "session-1-0"}
+        assert named._json_headers["X-Session-Id"] == "session-1-0"
+
     def test_toolbelt_has_required_methods(self):
         api_url = "https://test-mock-api.run.app"
         toolbelt = Toolbelt(api_base_url=api_url)
@@ -49,18 +60,14 @@ class TestToolbeltIntegration:
         def mock_get_products():
             return {"test": "data"}
 
-        original_method = toolbelt.get_products
-        toolbelt.get_products = mock_get_products
+        toolbelt._tools["get_products"] = mock_get_products
 
-        try:
-            result = toolbelt.use_tool("get_products", {})
+        result = toolbelt.use_tool("get_products", {})
 
-            # Should return JSON string
-            assert isinstance(result, str)
-            parsed = json.loads(result)
-            assert parsed["test"] == "data"
-        finally:
-            toolbelt.get_products = original_method
+        # Should return JSON string
+        assert isinstance(result, str)
+        parsed = json.loads(result)
+        assert parsed["test"] == "data"
 
     def test_toolbelt_use_tool_with_parameters(self):
         api_url = "https://test-mock-api.run.app"
@@ -69,16 +76,12 @@ class TestToolbeltIntegration:
         def mock_search_products(q):
             return {"query": q, "results": []}
 
-        original_method = toolbelt.search_products
-        toolbelt.search_products = mock_search_products
+        toolbelt._tools["search_products"] = mock_search_products
 
-        try:
-            result = toolbelt.use_tool("search_products", {"q": "test mouse"})
+        result = toolbelt.use_tool("search_products", {"q": "test mouse"})
 
-            parsed = json.loads(result)
-            assert parsed["query"] == "test mouse"
-        finally:
-            toolbelt.search_products = original_method
+        parsed = json.loads(result)
+        assert parsed["query"] == "test mouse"
 
     def test_toolbelt_use_tool_handles_invalid_tool(self):
         api_url = "https://test-mock-api.run.app"
@@ -90,27 +93,63 @@ class TestToolbeltIntegration:
         assert "error" in parsed
         assert "Tool 'invalid_tool' not found" in parsed["error"]
 
-    def test_toolbelt_with_real_mock_api_health(self):
-        mock_api_url = os.environ.get("MOCK_API_URL")
-        if not mock_api_url:
-            pytest.skip("MOCK_API_URL not set - skipping real integration test")
+    def test_toolbelt_use_tools_batch_preserves_order(self):
+        api_url = "https://test-mock-api.run.app"
+        toolbelt = Toolbelt(api_base_url=api_url)
+
+        def mock_search_products(q):
+            time.sleep(0.05 if q == "slow" else 0)
+            return {"query": q}
+
+        toolbelt._tools["search_products"] = mock_search_products
+
+        results = toolbelt.use_tools_batch(
+            [
+                ("search_products", {"q": "slow"}),
+                ("search_products", {"q": "fast"}),
+                ("invalid_tool", {}),
+            ]
+        )
+
+        assert json.loads(results[0]) == {"query": "slow"}
+        assert json.loads(results[1]) == {"query": "fast"}
+        assert "Tool 'invalid_tool' not found" in json.loads(results[2])["error"]
+
+    @pytest.mark.asyncio
+    async def test_toolbelt_ause_tool_with_valid_tool(self):
+        api_url = "https://test-mock-api.run.app"
+        toolbelt = Toolbelt(api_base_url=api_url)
+
+        async def mock_aget_products():
+            return {"test": "data"}
 
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
+        toolbelt._atools["get_products"] = mock_aget_products
 
-        health_result = toolbelt._make_request("GET", "/health")
+        result = await toolbelt.ause_tool("get_products", {})
+
+        assert json.loads(result) == {"test": "data"}
+
+    @pytest.mark.asyncio
+    async def test_toolbelt_ause_tool_handles_invalid_tool(self):
+        api_url = "https://test-mock-api.run.app"
+        toolbelt = Toolbelt(api_base_url=api_url)
+
+        result = await toolbelt.ause_tool("invalid_tool", {})
+
+        parsed = json.loads(result)
+        assert "Tool 'invalid_tool' not found" in parsed["error"]
+
+    @pytest.mark.integration
+    def test_toolbelt_with_real_mock_api_health(self, toolbelt):
+        health_result = toolbelt._request("GET", f"{toolbelt.base_url}/health")
 
         assert "status" in health_result
         assert health_result["status"] == "healthy"
         assert health_result["service"] == "mock-api"
         print(f"Health check: {health_result}")
 
-    def test_toolbelt_with_real_mock_api_products(self):
-        mock_api_url = os.environ.get("MOCK_API_URL")
-        if not mock_api_url:
-            pytest.skip("MOCK_API_URL not set - skipping real integration test")
-
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
-
+    @pytest.mark.integration
+    def test_toolbelt_with_real_mock_api_products(self, toolbelt):
         products_result = toolbelt.get_products()
 
         assert "products" in products_result
@@ -124,29 +163,27 @@ class TestToolbeltIntegration:
 
         print(f"Products: {len(products_result['products'])} found")
 
-    def test_toolbelt_discovers_case_sensitivity_flaw(self):
-        mock_api_url = os.environ.get("MOCK_API_URL")
-        if not mock_api_url:
-            pytest.skip("MOCK_API_URL not set - skipping real integration test")
-
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
-
-        search_caps = toolbelt.search_products("Laptop")
+    @pytest.mark.integration
+    @pytest.mark.asyncio
+    async def test_toolbelt_discovers_case_sensitivity_flaw(self, toolbelt):
+        # Independent searches, so they run concurrently
+        try:
+            search_caps, search_lower = await asyncio.gather(
+                toolbelt.asearch_products("Laptop"),
+                toolbelt.asearch_products("laptop"),
+            )
+        finally:
+            await toolbelt.aclose()
         print(f"Search 'Laptop': {len(search_caps['results'])} results")
-
-        search_lower = toolbelt.search_products("laptop")
         print(f"Search 'laptop': {len(search_lower['results'])} results")
 
         assert len(search_caps["results"]) != len(search_lower["results"])
         assert len(search_lower["results"]) == 0
 
-    def test_toolbelt_discovers_cart_inconsistency_flaw(self):
-        mock_api_url = os.environ.get("MOCK_API_URL")
-        if not mock_api_url:
-            pytest.skip("MOCK_API_URL not set - skipping real integration test")
-
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
-
+    @pytest.mark.integration
+    def test_toolbelt_discovers_cart_inconsistency_flaw(self, toolbelt):
+        # A fresh Toolbelt has its own session id, so this test gets an empty cart
+        toolbelt = Toolbelt(api_base_url=toolbelt.base_url)
         first_add = toolbelt.add_to_cart(item_id=1, quantity=1)
         print(f"First add result keys: {list(first_add.keys())}")
 
@@ -157,13 +194,8 @@ class TestToolbeltIntegration:
         assert "cart" not in second_add
         assert "message" in second_add
 
-    def test_toolbelt_discovers_slow_endpoint_flaw(self):
-        mock_api_url = os.environ.get("MOCK_API_URL")
-        if not mock_api_url:
-            pytest.skip("MOCK_API_URL not set - skipping real integration test")
-
-        toolbelt = Toolbelt(api_base_url=mock_api_url)
-
+    @pytest.mark.integration
+    def test_toolbelt_discovers_slow_endpoint_flaw(self, toolbelt):
         start_time = time.time()
 
         cart_result = toolbelt.get_cart()
@@ -1,17 +1,58 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from typing import List, Dict, Any
-import time
+from collections import OrderedDict
+from types import MappingProxyType
+import asyncio
+import hashlib
+import orjson
+
+
+class ORJSONResponse(JSONResponse):
+    """Serializes with orjson; replaces FastAPI's ORJSONResponse, which is deprecated."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 
 app = FastAPI(
-    title="Mock API Service", description="API with strategic flaws for persona testing"
+    title="Mock API Service",
+    description="API with strategic flaws for persona testing",
+    default_response_class=ORJSONResponse,
 )
+# Only bodies past ~500 bytes (the product listing, search hits) are worth compressing
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
+# In-memory cart state, one cart per session so concurrent users don't share items.
+# A session is the X-Session-Id header, or the client host when it is absent.
+# Session ids come from clients, so only the most recently used carts are kept.
+MAX_CARTS = 1024
+_CARTS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _session_id(request: Request) -> str:
+    session_id = request.headers.get("x-session-id")
+    if session_id:
+        return session_id
+    return request.client.host if request.client else "anonymous"
+
+
+def _cart_for(session_id: str) -> Dict[str, Any]:
+    """Return the session's cart, creating it and evicting the least recently used if full."""
+    cart = _CARTS.get(session_id)
+    if cart is None:
+        cart = {"add_count": 0, "items": []}
+        _CARTS[session_id] = cart
+        if len(_CARTS) > MAX_CARTS:
+            _CARTS.popitem(last=False)
+    else:
+        _CARTS.move_to_end(session_id)
+    return cart
 
-# In-memory storage for cart state tracking
-cart_add_count = 0
-cart_items = []
 
 # Mock product data
-PRODUCTS = [
+_RAW_PRODUCTS = (
     {
         "id": 1,
         "name": "Gaming Laptop",
@@ -47,98 +88,184 @@ PRODUCTS = [
         "description": "Multi-port USB-C hub with HDMI and Ethernet",
         "category": "Accessories",
     },
-]
+)
+
+# Read-only views of the catalog, so nothing mutates it by accident. orjson can't
+# encode a mappingproxy, so response bodies are built from _RAW_PRODUCTS instead.
+PRODUCTS = tuple(MappingProxyType(product) for product in _RAW_PRODUCTS)
+
+
+# The catalog never changes, so its listing is serialized once at import
+_PRODUCTS_BODY = orjson.dumps(
+    {"products": _RAW_PRODUCTS, "total": len(_RAW_PRODUCTS), "page": 1, "per_page": 10}
+)
+
+
+# The catalog bodies never change, so clients may cache them and revalidate by ETag
+_CACHE_CONTROL = "public, max-age=3600"
+
+
+def _etag(body: bytes) -> str:
+    # Weak, since GZipMiddleware may re-encode the body on the way out
+    return f'W/"{hashlib.sha1(body).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of etag against an If-None-Match list (RFC 9110, section 13.1.2)."""
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+    return False
+
+
+def _cacheable_response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+_PRODUCTS_ETAG = _etag(_PRODUCTS_BODY)
+
+# /health is the hottest endpoint under load, so its body is a literal
+_HEALTH_BODY = b'{"status":"healthy","service":"mock-api"}'
+
+_PRODUCTS_BY_ID = {product["id"]: product for product in PRODUCTS}
+
+# All product names in one string, so a query that matches none of them is rejected
+# with a single substring search instead of a scan over every product
+_NAME_SEPARATOR = "\0"
+_ALL_NAMES = _NAME_SEPARATOR.join(product["name"] for product in PRODUCTS)
 
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "mock-api"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @app.get("/products")
-async def get_products():
-    return {"products": PRODUCTS, "total": len(PRODUCTS), "page": 1, "per_page": 10}
+async def get_products(request: Request):
+    return _cacheable_response(request, _PRODUCTS_BODY, _PRODUCTS_ETAG)
+
+
+# Each product encoded once, so a search response is spliced from prebuilt bytes
+_PRODUCT_JSON = tuple(
+    (product["name"], orjson.dumps(product)) for product in _RAW_PRODUCTS
+)
 
 
 @app.get("/search")
 async def search_products(q: str):
     # INTENTIONAL FLAW: Case-sensitive search
+    if _NAME_SEPARATOR not in q and q not in _ALL_NAMES:
+        return {"results": [], "query": q, "total": 0}
+
     results = [
-        product
-        for product in PRODUCTS
-        if q in product["name"]  # No .lower() - case sensitive!
+        product_json
+        for name, product_json in _PRODUCT_JSON
+        if q in name  # No .lower() - case sensitive!
     ]
 
-    return {"results": results, "query": q, "total": len(results)}
+    body = b"".join(
+        (
+            b'{"results":[',
+            b",".join(results),
+            b'],"query":',
+            orjson.dumps(q),
+            b',"total":',
+            str(len(results)).encode(),
+            b"}",
+        )
+    )
+    return Response(content=body, media_type="application/json")
 
 
 @app.post("/cart/add")
-async def add_to_cart(item: Dict[str, Any]):
+async def add_to_cart(item: Dict[str, Any], request: Request):
     """FLAWED endpoint - inconsistent response format (confuses developers)"""
-    global cart_add_count, cart_items
+    cart = _cart_for(_session_id(request))
 
-    cart_add_count += 1
-    cart_items.append(item)
+    # No await between reading and updating the cart, so concurrent adds cannot interleave
+    cart["add_count"] += 1
+    cart["items"].append(item)
 
-    if cart_add_count == 1:
+    if cart["add_count"] == 1:
         # FIRST CALL: Return full cart object
-        return {"cart": {"items": cart_items, "total_items": len(cart_items)}}
+        items = list(cart["items"])
+        return {"cart": {"items": items, "total_items": len(items)}}
     else:
         # SUBSEQUENT CALLS: Return just a message (INCONSISTENT!)
         return {"message": "Item added to cart successfully"}
 
 
 @app.get("/cart")
-async def get_cart():
+async def get_cart(request: Request):
     # INTENTIONAL FLAW: Artificial delay
-    time.sleep(2.5)  # Frustratingly slow!
+    await asyncio.sleep(2.5)  # Frustratingly slow! (but doesn't block other requests)
 
+    cart = _CARTS.get(_session_id(request))
+    items = list(cart["items"]) if cart else []
     return {
-        "items": cart_items,
-        "total": len(cart_items),
+        "items": items,
+        "total": len(items),
         "message": "Cart loaded successfully",
     }
 
 
+# Intentional flaw: Required fields not documented in API spec.
+_REQUIRED_FIELDS = ["shipping_address", "billing_address", "tax_id"]
+_REQUIRED = frozenset(_REQUIRED_FIELDS)
+
+
+def _missing_fields_detail(missing_fields: List[str]) -> Dict[str, Any]:
+    return {
+        "error": "Missing required fields",
+        "required_fields": _REQUIRED_FIELDS,
+        "missing": missing_fields,
+    }
+
+
+# Most failing checkouts send none of the required fields, so that error is prebuilt
+_MISSING_ALL_BODY = orjson.dumps({"detail": _missing_fields_detail(_REQUIRED_FIELDS)})
+
+
 @app.post("/checkout")
 async def checkout(checkout_data: Dict[str, Any]):
-    # Intentional flaw: Required fields not documented in API spec.
-    required_fields = ["shipping_address", "billing_address", "tax_id"]
-    missing_fields = []
-
-    for field in required_fields:
-        if field not in checkout_data:
-            missing_fields.append(field)
+    if not _REQUIRED.issubset(checkout_data):
+        if _REQUIRED.isdisjoint(checkout_data):
+            return Response(
+                content=_MISSING_ALL_BODY, status_code=400, media_type="application/json"
+            )
 
-    if missing_fields:
+        # Keep the documented field order in the error rather than set order
+        missing = _REQUIRED.difference(checkout_data)
         raise HTTPException(
             status_code=400,
-            detail={
-                "error": "Missing required fields",
-                "required_fields": required_fields,
-                "missing": missing_fields,
-            },
+            detail=_missing_fields_detail(
+                [field for field in _REQUIRED_FIELDS if field in missing]
+            ),
         )
 
     return {"message": "Checkout successful", "order_id": "12345"}
 
 
+# Intentional flaw: Accessible endpoint that reveals system info in error
+_ADMIN_DENIED_BODY = orjson.dumps(
+    {
+        "detail": "Access denied. Admin database connection requires elevated privileges. Contact system administrator for user table access."
+    }
+)
+
+
 @app.get("/admin/users")
 async def admin_users():
-    # Intentional flaw: Accessible endpoint that reveals system info in error
-    raise HTTPException(
-        status_code=403,
-        detail="Access denied. Admin database connection requires elevated privileges. Contact system administrator for user table access.",
-    )
-
+    return Response(content=_ADMIN_DENIED_BODY, status_code=403, media_type="application/json")
 
-@app.get("/products/{product_id}/total_cost")
-async def get_product_total_cost(product_id: int):
-    # Intentional flaw: Reveals hidden fees (frustrates budget-conscious users)
-    product = next((p for p in PRODUCTS if p["id"] == product_id), None)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
 
+def _total_cost(product: Dict[str, Any]) -> Dict[str, Any]:
     base_price = product["price"]
 
     # Intentional flaw: Hidden fees revealed only when explicitly requested
@@ -151,8 +278,28 @@ async def get_product_total_cost(product_id: int):
     total_fees = sum(fee["amount"] for fee in fees)
 
     return {
-        "product_id": product_id,
+        "product_id": product["id"],
         "base_price": base_price,
         "fees": fees,
         "total_cost": base_price + total_fees,
     }
+
+
+# Prices are fixed, so every product's fee breakdown is serialized once at import
+_TOTAL_COST_BODIES = {
+    product_id: orjson.dumps(_total_cost(product))
+    for product_id, product in _PRODUCTS_BY_ID.items()
+}
+_TOTAL_COST_ETAGS = {
+    product_id: _etag(body) for product_id, body in _TOTAL_COST_BODIES.items()
+}
+
+
+@app.get("/products/{product_id}/total_cost")
+async def get_product_total_cost(product_id: int, request: Request):
+    # Intentional flaw: Reveals hidden fees (frustrates budget-conscious users)
+    body = _TOTAL_COST_BODIES.get(product_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    return _cacheable_response(request, body, _TOTAL_COST_ETAGS[product_id])
@@ -2,15 +2,39 @@
 """
 Mock API Service Entry Point
 """
+import os
 import uvicorn
+from pathlib import Path
 from app.api import app
+from fastapi import Response
 from fastapi.staticfiles import StaticFiles
 
-app.mount("/ui", StaticFiles(directory="mock-ui", html=True), name="ui")
+UI_DIRECTORY = "mock-ui"
+
+# The UI entry page is read once at startup, so hitting /ui/ never touches the filesystem
+_INDEX_BYTES = (Path(UI_DIRECTORY) / "index.html").read_bytes()
+
+
+@app.get("/ui", include_in_schema=False)
+@app.get("/ui/", include_in_schema=False)
+async def ui_index():
+    return Response(content=_INDEX_BYTES, media_type="text/html")
+
+
+# Registered after the index routes, so the mount only serves asset subpaths
+app.mount("/ui", StaticFiles(directory=UI_DIRECTORY, html=False), name="ui")
 
 if __name__ == "__main__":
-    # For local development
-    uvicorn.run("server:app", host="0.0.0.0", port=8001, reload=True)
+    # uvloop and httptools come with uvicorn[standard]; reload only for local development
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=8001,
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=30,
+        reload=os.environ.get("DEV") == "1",
+    )
 else:
     # For production/Cloud Run
     # This module will be imported by uvicorn
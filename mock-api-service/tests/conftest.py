@@ -0,0 +1,11 @@
+import httpx
+import pytest_asyncio
+from app.api import app
+
+
+@pytest_asyncio.fixture
+async def client():
+    """Async client that calls the app in-process on the test's event loop, with no thread hop."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+        yield test_client
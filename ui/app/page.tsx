@@ -49,6 +49,9 @@ export default function PersonaFlowApp() {
 
   const connectWebSocket = (sessionId: string) => {
     const ws = new WebSocket(`ws://localhost:8000/api/test-sessions/${sessionId}/logs`)
+    // Logs are sent as UTF-8 JSON bytes (binary frames)
+    ws.binaryType = "arraybuffer"
+    const decoder = new TextDecoder()
     
     ws.onopen = () => {
       console.log("WebSocket connected for session:", sessionId)
@@ -56,8 +59,11 @@ export default function PersonaFlowApp() {
     
     ws.onmessage = (event) => {
       try {
-        const logMessage: LogMessage = JSON.parse(event.data)
-        setLogs(prev => [...prev, logMessage])
+        const raw = typeof event.data === "string" ? event.data : decoder.decode(event.data)
+        // The server batches bursts of logs into a single JSON array frame
+        const parsed: LogMessage | LogMessage[] = JSON.parse(raw)
+        const messages = Array.isArray(parsed) ? parsed : [parsed]
+        setLogs(prev => [...prev, ...messages])
         
         // Auto-scroll to bottom after a short delay to allow rendering
         setTimeout(() => {
@@ -67,8 +73,9 @@ export default function PersonaFlowApp() {
         }, 100)
         
         // Check for completion
-        if (logMessage.type === "complete" && logMessage.data?.report) {
-          setFinalReport(logMessage.data.report)
+        const completion = messages.find(m => m.type === "complete" && m.data?.report)
+        if (completion) {
+          setFinalReport(completion.data.report)
           setPhase("complete")
         }
       } catch (error) {